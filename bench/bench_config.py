@@ -0,0 +1,221 @@
+"""
+Measures deserializing large script settings with many registered meta scripts.
+
+Compares the former linear meta script merge with the merge keyed on
+(tag, id), and the former per-field conversions with the field tables.
+
+Usage: python bench/bench_config.py [--scripts S] [--metas M] [--calls C]
+"""
+
+import sys
+import argparse
+
+from dataclasses import asdict
+
+from time import perf_counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_anki import install, load_addon_module
+
+
+def report(title, durations):
+    durations = sorted(durations)
+
+    print(
+        f"{title:<32} {len(durations):>6} calls  "
+        f"p50 {durations[len(durations) // 2] * 1e3:>9.3f}ms  "
+        f"max {durations[-1] * 1e3:>9.3f}ms"
+    )
+
+
+def legacy_add_other_metas(config, model_id, scripts):
+    """The merge before it was keyed on (tag, id)"""
+    for ms in config.get_meta_scripts(model_id):
+        try:
+            next(
+                filter(
+                    lambda script: isinstance(script, config.MetaScript)
+                    and script.tag == ms.tag
+                    and script.id == ms.id,
+                    scripts,
+                )
+            )
+        except StopIteration:
+            scripts.append(config.make_meta_script(ms.tag, ms.id))
+
+    return list(filter(lambda script: not config.should_autodelete(script), scripts))
+
+
+def legacy_deserialize_script(lib, config, script_data):
+    """Spelled out every field, and validated them in `make_script_v2`"""
+    if "name" not in script_data:
+        return lib.make_meta_script(
+            script_data["tag"],
+            script_data["id"],
+            lib.make_script_storage(**script_data["storage"]),
+        )
+
+    default = config.DEFAULT_CONCRETE_SCRIPT
+
+    return lib.make_script_v2(
+        name=script_data["name"] if "name" in script_data else default.name,
+        enabled=script_data["enabled"] if "enabled" in script_data else default.enabled,
+        type=script_data["type"] if "type" in script_data else default.type,
+        label=script_data["label"] if "label" in script_data else default.label,
+        version=script_data["version"] if "version" in script_data else default.version,
+        description=script_data["description"]
+        if "description" in script_data
+        else default.description,
+        position=script_data["position"]
+        if "position" in script_data
+        else default.position,
+        conditions=script_data["conditions"]
+        if "conditions" in script_data
+        else default.conditions,
+        code=script_data["code"] if "code" in script_data else default.code,
+        execution=script_data["execution"]
+        if "execution" in script_data
+        else default.execution,
+        lazy=script_data["lazy"] if "lazy" in script_data else default.lazy,
+    )
+
+
+def legacy_serialize_script(config, script):
+    """Went through the deep copies of `asdict`"""
+    if isinstance(script, config.ConcreteScript):
+        return asdict(script)
+
+    preresult = asdict(script)
+
+    return {
+        "tag": preresult["tag"],
+        "id": preresult["id"],
+        "storage": {k: v for k, v in preresult["storage"].items() if v is not None},
+    }
+
+
+def make_setting(args, stored_metas):
+    return {
+        "enabled": True,
+        "insertStub": False,
+        "indentSize": 4,
+        "scripts": [
+            {
+                "name": f"Script {idx}",
+                "enabled": True,
+                "type": "js",
+                "label": "",
+                "version": "v1",
+                "description": "",
+                "position": "into_template",
+                "code": f"console.log({idx})\n" * args.lines,
+                "conditions": ["&", ["card", "=", f"Card {idx % 3}"], ["tag", "=", "x"]],
+                "execution": "immediate",
+                "lazy": "",
+            }
+            for idx in range(args.scripts)
+        ]
+        + [
+            {"tag": tag, "id": id, "storage": {"code": "", "enabled": True}}
+            for tag, id in stored_metas
+        ],
+    }
+
+
+def measure(calls, fn):
+    durations = []
+
+    for _ in range(calls):
+        start = perf_counter()
+        fn()
+        durations.append(perf_counter() - start)
+
+    return durations
+
+
+def measure_alternately(calls, *fns):
+    """Both variants of a comparison are called in turn, so they run under the same
+    load of the machine, instead of one after the other"""
+    durations = [[] for _ in fns]
+
+    for _ in range(calls):
+        for fn, fn_durations in zip(fns, durations):
+            start = perf_counter()
+            fn()
+            fn_durations.append(perf_counter() - start)
+
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--scripts", type=int, default=500, help="concrete scripts")
+    parser.add_argument("--metas", type=int, default=50, help="registered meta scripts")
+    parser.add_argument("--tags", type=int, default=5, help="registered interfaces")
+    parser.add_argument("--lines", type=int, default=10, help="lines of code per script")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    install()
+    lib = load_addon_module("src.lib")
+    config = load_addon_module("src.config")
+    model_id = 1
+
+    for tag_idx in range(args.tags):
+        lib.make_and_register_interface(
+            tag=f"benchMeta{tag_idx}",
+            getter=lambda id, storage: lib.make_script_v2(name=id, code=""),
+            setter=lambda id, script: True,
+            autodelete=lambda id, storage: False,
+        )
+
+    metas = [(f"benchMeta{idx % args.tags}", f"meta{idx}") for idx in range(args.metas)]
+
+    for tag, id in metas:
+        lib.register_meta_script(model_id, lib.make_meta_script(tag, id))
+
+    # half of the meta scripts were already written to the setting
+    setting = make_setting(args, metas[: args.metas // 2])
+
+    scripts = [config.deserialize_script(script) for script in setting["scripts"]]
+
+    print(
+        f"{args.scripts} concrete scripts, {args.metas} meta scripts "
+        f"of {args.tags} interfaces"
+    )
+
+    linear, keyed = measure_alternately(
+        args.calls,
+        lambda: legacy_add_other_metas(config, model_id, list(scripts)),
+        lambda: config.add_other_metas(model_id, list(scripts)),
+    )
+    report("meta merge (linear)", linear)
+    report("meta merge (keyed)", keyed)
+
+    per_field, table = measure_alternately(
+        args.calls,
+        lambda: [
+            legacy_deserialize_script(lib, config, script) for script in setting["scripts"]
+        ],
+        lambda: [config.deserialize_script(script) for script in setting["scripts"]],
+    )
+    report("scripts from dicts (per field)", per_field)
+    report("scripts from dicts (table)", table)
+
+    legacy_dumped, dumped = measure_alternately(
+        args.calls,
+        lambda: [legacy_serialize_script(config, script) for script in scripts],
+        lambda: [config.serialize_script(script) for script in scripts],
+    )
+    report("scripts to dicts (asdict)", legacy_dumped)
+    report("scripts to dicts (table)", dumped)
+    report(
+        "deserialize setting",
+        measure(args.calls, lambda: config.deserialize_setting(model_id, setting)),
+    )
+
+
+if __name__ == "__main__":
+    main()
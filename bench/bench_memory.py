@@ -0,0 +1,105 @@
+"""
+Measures the memory held by registered meta scripts and deserialized settings.
+
+Builds the same objects from the slotted dataclasses of `config_types` and from
+plain frozen dataclasses with the same fields, and compares them with tracemalloc.
+
+Usage: python bench/bench_memory.py [--models N] [--addons A] [--scripts S]
+"""
+
+import sys
+import argparse
+import tracemalloc
+
+from pathlib import Path
+from dataclasses import fields, make_dataclass
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_anki import install, load_addon_module
+
+
+def unslotted(cls):
+    """Frozen dataclass with the same fields, which keeps a `__dict__` per instance"""
+    return make_dataclass(
+        cls.__name__,
+        [(field.name, field.type, field) for field in fields(cls)],
+        frozen=True,
+    )
+
+
+def build(classes, args):
+    ConcreteScript, MetaScript, ScriptStorage, ScriptSetting = classes
+    storage = (None,) * len(fields(ScriptStorage))
+
+    # one meta script per note type and add-on, as held by the registry
+    registry = [
+        (
+            model_id,
+            MetaScript(f"addon{addon}", f"{model_id}", ScriptStorage(*storage)),
+        )
+        for model_id in range(args.models)
+        for addon in range(args.addons)
+    ]
+
+    settings = [
+        ScriptSetting(
+            True,
+            False,
+            4,
+            [
+                ConcreteScript(
+                    "Script", True, "js", "", "v1", "", "head", [], "", "immediate", ""
+                )
+                for _ in range(args.scripts)
+            ],
+        )
+        for _ in range(args.models)
+    ]
+
+    return registry, settings
+
+
+def measure(classes, args):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build(classes, args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    del objects
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--models", type=int, default=1000, help="number of note types")
+    parser.add_argument("--addons", type=int, default=5, help="add-ons registering meta scripts")
+    parser.add_argument("--scripts", type=int, default=10, help="concrete scripts per setting")
+    args = parser.parse_args()
+
+    install()
+    config_types = load_addon_module("src.config_types")
+
+    slotted = (
+        config_types.ConcreteScript,
+        config_types.MetaScript,
+        config_types.ScriptStorage,
+        config_types.ScriptSetting,
+    )
+
+    plain_size = measure(tuple(unslotted(cls) for cls in slotted), args)
+    slotted_size = measure(slotted, args)
+    objects = args.models * (2 * args.addons + 1 + args.scripts)
+
+    print(
+        f"{args.models} note types, {args.addons} meta scripts each, "
+        f"{args.scripts} concrete scripts per setting ({objects} objects)"
+    )
+    print(f"{'plain dataclasses':<20} {plain_size / 1024:>10.1f} kB")
+    print(f"{'slotted dataclasses':<20} {slotted_size / 1024:>10.1f} kB")
+    print(f"{'reduction':<20} {1 - slotted_size / plain_size:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
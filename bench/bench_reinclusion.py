@@ -0,0 +1,182 @@
+"""
+Compares the question side reinclusion guards on answer sides with many script blocks.
+
+Writes an HTML page which renders question and answer sides the way Anki's
+reviewer does: with the legacy querySelectorAll/outerHTML sweep, with the
+window-level guard, and with the scripts shared by both sides left out of the
+answer side, as written back for templates including {{FrontSide}}. Open it in a browser, or pass --browser to run it
+headless and print the results.
+
+Usage: python bench/bench_reinclusion.py [--scripts S] [--filler F] [--renders R] [--browser PATH]
+"""
+
+import re
+import sys
+import html
+import json
+import argparse
+import subprocess
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_anki import install, load_addon_module
+
+
+runner = """
+<pre id="results">running</pre>
+<div id="qa"></div>
+<script>
+const cases = %s
+const renders = %d
+
+// mirrors jQuery's html(): scripts are run in order, unless they were removed
+function render(container, text) {
+  container.innerHTML = text
+  for (const script of Array.from(container.getElementsByTagName("script"))) {
+    if (script.isConnected) {
+      (0, eval)(script.text)
+    }
+  }
+  // forces style and layout, as the reviewer would
+  return container.offsetHeight
+}
+
+const qa = document.getElementById("qa")
+const lines = []
+
+for (const [name, front, back] of cases) {
+  window.amRuns = 0
+  let answerTime = 0
+
+  for (let i = 0; i < renders; i++) {
+    render(qa, front)
+    const start = performance.now()
+    render(qa, back)
+    answerTime += performance.now() - start
+  }
+
+  lines.push(`${name.padEnd(10)} ${(answerTime / renders).toFixed(3).padStart(9)}ms per answer side   ${(window.amRuns / renders).toFixed(0)} script runs per card`)
+}
+
+document.getElementById("results").textContent = lines.join("\\n")
+</script>
+"""
+
+
+def make_setting(config, scripts: int):
+    return config.deserialize_setting(
+        1,
+        {
+            "enabled": True,
+            "scripts": [
+                {
+                    "name": f"Script {idx}",
+                    "enabled": True,
+                    "type": "js",
+                    "position": "into_template",
+                    "conditions": [],
+                    "code": f"window.amRuns++\nvar amValue{idx} = {idx}",
+                }
+                for idx in range(scripts)
+            ],
+        },
+    )
+
+
+def make_filler(fields: int) -> str:
+    return "\n".join(
+        f'<div class="field-{idx}"><b>Field {idx}</b> <span>{"lorem ipsum " * 8}</span></div>'
+        for idx in range(fields)
+    )
+
+
+def make_cases(stringify, stringify_module, setting, filler: str):
+    guarded = {
+        fmt: stringify.stringify_for_template(setting, "Bench", 1, "Card 1", fmt)
+        for fmt in ["question", "answer"]
+    }
+
+    deduplicated = {
+        fmt: stringify.stringify_for_template(setting, "Bench", 1, "Card 1", fmt, True)
+        for fmt in ["question", "answer"]
+    }
+
+    legacy = {}
+    for fmt in ["question", "answer"]:
+        scripts = stringify_module.stringify_setting(
+            setting, "Bench", 1, "Card 1", fmt
+        )
+
+        if fmt == "question":
+            scripts.insert(
+                0,
+                stringify_module.stringify_script_data(
+                    stringify_module.reinclusion_sweep, 4, True
+                ),
+            )
+
+        legacy[fmt] = stringify_module.encapsulate_scripts(scripts, "bench", 4)
+
+    def sides(blocks):
+        front = f"{filler}\n{blocks['question']}"
+        return [front, f"{front}\n<hr id=answer>\n{filler}\n{blocks['answer']}"]
+
+    return [
+        ["sweep", *sides(legacy)],
+        ["guard", *sides(guarded)],
+        ["frontside", *sides(deduplicated)],
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--scripts", type=int, default=50, help="scripts per block")
+    parser.add_argument("--filler", type=int, default=200, help="filler elements per side")
+    parser.add_argument("--renders", type=int, default=200, help="cards to render")
+    parser.add_argument("--output", default="bench_reinclusion.html")
+    parser.add_argument("--browser", help="headless capable chrome/chromium binary")
+    args = parser.parse_args()
+
+    install()
+    config = load_addon_module("src.config")
+    stringify = load_addon_module("src.stringify")
+    stringify_module = load_addon_module("src.stringify.stringify")
+
+    cases = make_cases(
+        stringify,
+        stringify_module,
+        make_setting(config, args.scripts),
+        make_filler(args.filler),
+    )
+
+    page = runner % (json.dumps(cases).replace("</", "<\\/"), args.renders)
+    output = Path(args.output).resolve()
+    output.write_text(f"<!doctype html>\n<html><body>{page}</body></html>")
+
+    print(f"{args.scripts} scripts per block, {args.filler} filler elements per side")
+
+    if not args.browser:
+        print(f"Open {output.as_uri()} in a browser")
+        return
+
+    dom = subprocess.run(
+        [
+            args.browser,
+            "--headless",
+            "--disable-gpu",
+            "--no-sandbox",
+            "--dump-dom",
+            output.as_uri(),
+        ],
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    results = re.search(r'<pre id="results">(.*?)</pre>', dom, re.DOTALL)
+    print(html.unescape(results.group(1)) if results else dom)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Simulates reviewer page loads to measure the head/body injection path.
+
+Usage: python bench/bench_review.py [--models N] [--templates M] [--scripts S] ...
+"""
+
+import sys
+import random
+import argparse
+
+from time import perf_counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_anki import (
+    install,
+    load_addon_module,
+    Card,
+    Reviewer,
+    Previewer,
+    WebContent,
+)
+
+
+def percentile(sorted_samples, fraction):
+    return sorted_samples[round(fraction * (len(sorted_samples) - 1))]
+
+
+def report(title, durations):
+    durations = sorted(durations)
+    total = sum(durations)
+
+    print(
+        f"{title:<28} {len(durations):>7} loads  {len(durations) / total:>10.0f} loads/s  "
+        f"p50 {percentile(durations, 0.5) * 1e6:>9.1f}us  "
+        f"p95 {percentile(durations, 0.95) * 1e6:>9.1f}us  "
+        f"p99 {percentile(durations, 0.99) * 1e6:>9.1f}us  "
+        f"max {durations[-1] * 1e6:>9.1f}us"
+    )
+
+
+def make_code(idx: int, lines: int) -> str:
+    return "\n".join(
+        f"var amBench{idx}_{line} = document.querySelectorAll('.field-{line}').length"
+        for line in range(lines)
+    )
+
+
+positions = ["head", "body", "into_template", "head", "body"]
+
+
+def make_concrete_script(idx: int, lines: int) -> dict:
+    return {
+        "name": f"Script {idx}",
+        "enabled": True,
+        "type": "js",
+        "label": "",
+        "version": "v1",
+        "description": "",
+        "position": positions[idx % len(positions)],
+        "conditions": [] if idx % 3 else ["card", "endsWith", str(idx % 2 + 1)],
+        "code": make_code(idx, lines),
+    }
+
+
+def setup_collection(mw, lib, args):
+    rng = random.Random(args.seed)
+    meta_tag = "benchMeta"
+
+    lib.register_interface(
+        lib.make_interface(
+            tag=meta_tag,
+            getter=lambda id, storage: lib.make_script_v2(
+                name=f"Meta {id}",
+                enabled=True,
+                type="js",
+                label="",
+                version="v1",
+                description="",
+                position=positions[int(id.split("_")[1]) % len(positions)],
+                conditions=[],
+                code="",
+            ),
+            setter=lambda id, script: True,
+            generator=lambda id, storage, model, tmpl, pos: make_code(
+                len(id), args.lines
+            ),
+        )
+    )
+
+    for model_idx in range(args.models):
+        model_id = 1000 + model_idx
+        scripts = []
+
+        for script_idx in range(args.scripts):
+            if rng.random() < args.meta_ratio:
+                meta_id = f"{model_id}_{script_idx}"
+                lib.register_meta_script(model_id, lib.make_meta_script(meta_tag, meta_id))
+                scripts.append({"tag": meta_tag, "id": meta_id, "storage": {}})
+            else:
+                scripts.append(make_concrete_script(script_idx, args.lines))
+
+        mw.col.models.add(
+            {
+                "id": model_id,
+                "name": f"Note Type {model_idx}",
+                "mod": 1,
+                "tmpls": [
+                    {"name": f"Card {tmpl_idx + 1}", "ord": tmpl_idx}
+                    for tmpl_idx in range(args.templates)
+                ],
+                "assetManager": {
+                    "enabled": True,
+                    "insertStub": False,
+                    "indentSize": 4,
+                    "scripts": scripts,
+                },
+            }
+        )
+
+
+def make_cards(mw, args):
+    rng = random.Random(args.seed)
+    models = mw.col.models.all()
+
+    return [
+        Card(mw.col, idx, model, rng.randrange(len(model["tmpls"])))
+        for idx, model in enumerate(
+            rng.choice(models) for _ in range(args.loads)
+        )
+    ]
+
+
+def bench_append_scripts(webview, render_cache, cards, cold):
+    durations = []
+
+    for card in cards:
+        if cold:
+            render_cache.clear()
+
+        web_content = WebContent()
+        start = perf_counter()
+        webview.append_scripts(web_content, Reviewer(card))
+        durations.append(perf_counter() - start)
+
+    return durations
+
+
+def bench_card_will_show(webview, delta, cards, context, kind):
+    """Builds the page once, every later card only receives the missing assets"""
+    webview.append_scripts(WebContent(), context)
+    durations = []
+
+    for card in cards:
+        start = perf_counter()
+        delta.inject_missing_assets("", card, kind)
+        durations.append(perf_counter() - start)
+
+    return durations
+
+
+def bench_stringify(stringify, config, cards):
+    durations = []
+
+    for card in cards:
+        model = card.model()
+        template_name = card.template()["name"]
+
+        start = perf_counter()
+        setting = config.get_setting_from_notetype(model)
+        stringify.stringify_for_head(setting, model["name"], model["id"], template_name)
+        stringify.stringify_for_body(setting, model["name"], model["id"], template_name)
+        durations.append(perf_counter() - start)
+
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--models", type=int, default=50, help="number of note types")
+    parser.add_argument("--templates", type=int, default=3, help="card types per note type")
+    parser.add_argument("--scripts", type=int, default=20, help="scripts per setting")
+    parser.add_argument("--meta-ratio", type=float, default=0.3, help="share of meta scripts")
+    parser.add_argument("--lines", type=int, default=10, help="lines of code per script")
+    parser.add_argument("--loads", type=int, default=5000, help="simulated page loads")
+    parser.add_argument("--external", action="store_true", help="serve head/body as files")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mw = install()
+    lib = load_addon_module("src.lib")
+    config = load_addon_module("src.config")
+    stringify = load_addon_module("src.stringify")
+    utils = load_addon_module("src.utils")
+    webview = load_addon_module("src.webview")
+    delta = load_addon_module("src.webview.delta")
+    render_cache = load_addon_module("src.render_cache").render_cache
+
+    utils.external_assets.value = args.external
+    setup_collection(mw, lib, args)
+    cards = make_cards(mw, args)
+
+    print(
+        f"{args.models} note types x {args.templates} card types, "
+        f"{args.scripts} scripts per setting ({args.meta_ratio:.0%} meta), "
+        f"{'external' if args.external else 'inline'} delivery"
+    )
+
+    report("stringify head/body", bench_stringify(stringify, config, cards))
+    report("append_scripts (cold)", bench_append_scripts(webview, render_cache, cards, True))
+    render_cache.clear()
+    report("append_scripts (cached)", bench_append_scripts(webview, render_cache, cards, False))
+    report(
+        "card_will_show (review)",
+        bench_card_will_show(webview, delta, cards, Reviewer(cards[0]), "reviewQuestion"),
+    )
+    report(
+        "card_will_show (preview)",
+        bench_card_will_show(webview, delta, cards, Previewer(), "previewQuestion"),
+    )
+
+
+if __name__ == "__main__":
+    main()
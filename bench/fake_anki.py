@@ -0,0 +1,235 @@
+"""
+In-process stand-ins for the parts of `aqt` and `anki` used by the injection path.
+
+They allow importing the add-on on a plain Python installation without Anki,
+so the benchmarks can drive `append_scripts` and the stringify functions.
+"""
+
+import sys
+import importlib
+
+from pathlib import Path
+from tempfile import mkdtemp
+from types import ModuleType
+
+
+addon_name = "asset_manager"
+repo_dir = Path(__file__).resolve().parents[1]
+
+
+class Hook(list):
+    """Mirrors the `append`/`remove` interface of the generated gui_hooks"""
+
+    def __call__(self, *args):
+        for hook in self:
+            hook(*args)
+
+
+class Filter(Hook):
+    def __call__(self, value, *args):
+        for hook in self:
+            value = hook(value, *args)
+
+        return value
+
+
+class FakeModels:
+    def __init__(self):
+        self.models = {}
+
+    def add(self, model: dict) -> None:
+        self.models[model["id"]] = model
+
+    def get(self, model_id):
+        return self.models.get(int(model_id))
+
+    def all(self):
+        return list(self.models.values())
+
+    def ids(self):
+        return list(self.models.keys())
+
+    def save(self, model, *args, **kwargs):
+        model["mod"] += 1
+
+
+class FakeMedia:
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.files = {}
+
+    def dir(self) -> str:
+        return str(self.folder)
+
+    def write_data(self, filename: str, data: bytes) -> str:
+        (self.folder / filename).write_bytes(data)
+        return filename
+
+    def trash_files(self, filenames) -> None:
+        for filename in filenames:
+            (self.folder / filename).unlink()
+
+
+class FakeCollection:
+    def __init__(self, folder: Path):
+        self.models = FakeModels()
+        self.media = FakeMedia(folder)
+
+
+class FakeAddonManager:
+    def __init__(self, folder: Path):
+        self.folder = folder
+
+    def addonFromModule(self, module: str) -> str:
+        return module.split(".")[0]
+
+    def addonsFolder(self, dir=None) -> str:
+        return str(self.folder / dir) if dir else str(self.folder)
+
+    def setWebExports(self, *args) -> None:
+        pass
+
+    def setConfigAction(self, *args) -> None:
+        pass
+
+
+class FakeProfileManager:
+    def __init__(self):
+        self.profile = {}
+
+
+class FakeTaskManager:
+    """Runs tasks synchronously, which keeps the benchmarks deterministic"""
+
+    class Done:
+        def __init__(self, result):
+            self._result = result
+
+        def result(self):
+            return self._result
+
+    def run_in_background(self, task, on_done=None):
+        result = task()
+
+        if on_done:
+            on_done(self.Done(result))
+
+
+class FakeProgress:
+    def timer(self, ms, func, repeat, *args, **kwargs):
+        func()
+
+
+class FakeMainWindow:
+    def __init__(self):
+        self.tmpdir = Path(mkdtemp(prefix="asset_manager_bench_"))
+
+        media = self.tmpdir / "collection.media"
+        web = self.tmpdir / "addons21" / addon_name / "web"
+        media.mkdir(parents=True)
+        web.mkdir(parents=True)
+
+        self.col = FakeCollection(media)
+        self.addonManager = FakeAddonManager(self.tmpdir / "addons21")
+        self.pm = FakeProfileManager()
+        self.taskman = FakeTaskManager()
+        self.progress = FakeProgress()
+
+
+class Card:
+    """Mirrors `anki.cards.Card` for a card of a given note type and template"""
+
+    def __init__(self, col=None, id=None, model=None, ord=0):
+        self.col = col
+        self.id = id
+        self.ord = ord
+        self._model = model
+
+    def model(self):
+        return self._model
+
+    def template(self):
+        return self._model["tmpls"][self.ord]
+
+
+class Reviewer:
+    def __init__(self, card=None):
+        self.card = card
+
+
+class Previewer:
+    def __init__(self, card=None):
+        self._card = card
+
+    def card(self):
+        return self._card
+
+
+class CardLayout:
+    def __init__(self, card=None):
+        self.rendered_card = card
+
+
+class WebContent:
+    def __init__(self):
+        self.head = ""
+        self.body = ""
+        self.css = []
+        self.js = []
+
+
+def make_module(name: str, **attributes) -> ModuleType:
+    module = ModuleType(name)
+    module.__dict__.update(attributes)
+    sys.modules[name] = module
+
+    return module
+
+
+# hooks which pass on their first argument
+filter_names = {"card_will_show", "webview_did_receive_js_message"}
+
+
+def make_hooks_module(name: str) -> ModuleType:
+    module = make_module(name)
+    hooks = {}
+
+    def get_hook(hook_name: str):
+        if hook_name.startswith("__"):
+            raise AttributeError(hook_name)
+
+        if hook_name not in hooks:
+            hooks[hook_name] = Filter() if hook_name in filter_names else Hook()
+
+        return hooks[hook_name]
+
+    module.__getattr__ = get_hook
+    return module
+
+
+def install() -> FakeMainWindow:
+    """Registers the fake modules, needs to be called before importing the add-on"""
+
+    mw = FakeMainWindow()
+
+    make_module("aqt", mw=mw)
+    make_hooks_module("aqt.gui_hooks")
+    make_module("aqt.reviewer", Reviewer=Reviewer)
+    make_module("aqt.previewer", Previewer=Previewer)
+    make_module("aqt.clayout", CardLayout=CardLayout)
+    make_module("aqt.webview", WebContent=WebContent)
+    make_module("anki")
+    make_module("anki.cards", Card=Card)
+    make_module("anki.models", NoteType=dict)
+
+    return mw
+
+
+def load_addon_module(module: str) -> ModuleType:
+    """Imports a submodule of the add-on without running the add-on's `setup`"""
+
+    for name, path in [(addon_name, repo_dir), (f"{addon_name}.src", repo_dir / "src")]:
+        if name not in sys.modules:
+            make_module(name, __path__=[str(path)])
+
+    return importlib.import_module(f"{addon_name}.{module}")
@@ -50,6 +50,10 @@ def setup_script():
             else "into_template",
             conditions=storage.conditions if storage.conditions is not None else [],
             code=storage.code if storage.code is not None else script,
+            # "immediate", "defer" (after the card is shown), or "idle"
+            execution=storage.execution
+            if storage.execution is not None
+            else "immediate",
         ),
         # What happens when the user commits new changes to the script
         # Can be used for internal computation
@@ -59,7 +63,7 @@ def setup_script():
         # if returns Script, this Script is used for saving, otherwise it's the same as the argument
         setter=lambda id, script: True,
         # Collection of fields that are stored by Script Manager
-        store=["enabled", "code", "position", "conditions"],
+        store=["enabled", "code", "position", "conditions", "execution"],
         # Collection of fields that are read-only
         readonly=["name", "type", "version", "description"],
         # Change the code that is showed in the script window
@@ -32,8 +32,10 @@ from .forms.script_config_ui import Ui_ScriptConfig
 from .utils import (
     script_type_to_gui_text,
     script_position_to_gui_text,
+    script_execution_to_gui_text,
     pos_to_script_type,
     pos_to_script_position,
+    pos_to_script_execution,
 )
 from .highlighter import JSHighlighter
 from .syntax_checker import get_syntax_checker
@@ -122,6 +124,10 @@ class ScriptConfig(QDialog):
         self.ui.positionComboBox.setCurrentText(
             script_position_to_gui_text(concrete_script.position)
         )
+        self.ui.executionComboBox.setCurrentText(
+            script_execution_to_gui_text(concrete_script.execution)
+        )
+        self.ui.lazyLineEdit.setText(concrete_script.lazy)
         self.ui.conditionsTextEdit.setPlainText(json.dumps(concrete_script.conditions))
 
         self.ui.codeTextEdit.setPlainText(concrete_script.code)
@@ -175,6 +181,8 @@ class ScriptConfig(QDialog):
             self.ui.descriptionTextEdit.repaint()
 
             self.ui.positionComboBox.repaint()
+            self.ui.executionComboBox.repaint()
+            self.ui.lazyLineEdit.repaint()
             self.ui.conditionsTextEdit.repaint()
 
             self.ui.codeTextEdit.repaint()
@@ -197,6 +205,8 @@ class ScriptConfig(QDialog):
         self.ui.descriptionTextEdit.setReadOnly(not state or readonly.description)
 
         self.ui.positionComboBox.setEnabled(state and not readonly.position)
+        self.ui.executionComboBox.setEnabled(state and not readonly.execution)
+        self.ui.lazyLineEdit.setReadOnly(not state or readonly.lazy)
         self.ui.conditionsTextEdit.setReadOnly(not state or readonly.conditions)
 
         self.ui.codeTextEdit.setReadOnly(not state or readonly.code)
@@ -252,6 +262,10 @@ class ScriptConfig(QDialog):
                 ),
                 "conditions": self.getConditions(),
                 "code": self.ui.codeTextEdit.toPlainText(),
+                "execution": pos_to_script_execution(
+                    self.ui.executionComboBox.currentIndex()
+                ),
+                "lazy": self.ui.lazyLineEdit.text().strip(),
             }
         )
 
@@ -0,0 +1,102 @@
+from typing import Callable, List
+
+from aqt.qt import QDialog
+from aqt.utils import getSaveFile, restoreGeom, saveGeom, tooltip
+
+from .forms.script_profile_ui import Ui_ScriptProfile
+
+
+geom_name = "assetManagerScriptProfile"
+
+
+def format_profile(stats: List[dict]) -> str:
+    if len(stats) == 0:
+        return "No scripts were profiled yet. Enable profiling and review some cards."
+
+    header = f"{'Note Type':<24} {'Card Type':<20} {'Script':<28} {'Loads':>7} {'Runs':>7} {'mean ms':>9} {'max ms':>9} {'total ms':>10}"
+    slowest = [
+        f"{s['model'][:24]:<24} {s['template'][:20]:<20} {s['script'][:28]:<28} {s['loads']:>7} {s['runs']:>7} {s['mean']:>9.2f} {s['max']:>9.2f} {s['total']:>10.2f}"
+        for s in stats
+        if s["runs"] > 0
+    ]
+
+    never_run = [
+        f"{s['model'][:24]:<24} {s['template'][:20]:<20} {s['script'][:28]:<28} {s['loads']:>7}"
+        for s in stats
+        if s["runs"] == 0
+    ]
+
+    return "\n".join(
+        [
+            "Slowest scripts per note type",
+            "",
+            header,
+            "-" * len(header),
+            *slowest,
+            "",
+            "Loaded, but never run",
+            "",
+            *(never_run if len(never_run) > 0 else ["None"]),
+        ]
+    )
+
+
+class ScriptProfile(QDialog):
+    def __init__(
+        self,
+        parent,
+        get_stats: Callable[[], List[dict]],
+        export_stats: Callable[[], str],
+        reset_stats: Callable[[], None],
+        set_profiling: Callable[[bool], None],
+    ):
+        super().__init__(parent=parent)
+
+        self.get_stats = get_stats
+        self.export_stats = export_stats
+        self.reset_stats = reset_stats
+        self.set_profiling = set_profiling
+
+        self.ui = Ui_ScriptProfile()
+        self.ui.setupUi(self)
+
+        self.ui.refreshButton.clicked.connect(self.refresh)
+        self.ui.resetButton.clicked.connect(self.reset)
+        self.ui.exportButton.clicked.connect(self.export)
+        self.finished.connect(self.save_geom)
+
+        restoreGeom(self, geom_name)
+
+    def setupUi(self, profiling: bool):
+        self.ui.profileCheckBox.setChecked(profiling)
+        self.ui.profileCheckBox.toggled.connect(self.set_profiling)
+
+        self.refresh()
+
+    def refresh(self):
+        self.ui.statsText.setPlainText(format_profile(self.get_stats()))
+
+    def reset(self):
+        self.reset_stats()
+        self.refresh()
+
+    def export(self):
+        filename = getSaveFile(
+            self,
+            "Export Script Profile",
+            "assetManagerScriptProfile",
+            "JSON",
+            ".json",
+            "asset_manager_script_profile.json",
+        )
+
+        if not filename:
+            return
+
+        with open(filename, "w") as jsonfile:
+            jsonfile.write(self.export_stats())
+
+        tooltip("Exported script profile")
+
+    def save_geom(self):
+        saveGeom(self, geom_name)
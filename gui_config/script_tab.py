@@ -62,6 +62,9 @@ class ScriptTab(QWidget):
         self.modelId = modelId
         self.ui.enableCheckBox.setChecked(setting.enabled),
         self.ui.insertStubCheckBox.setChecked(setting.insert_stub),
+        self.ui.coalesceCheckBox.setChecked(setting.coalesce)
+        self.ui.externalizeSpinBox.setValue(setting.externalize_threshold)
+        self.ui.bundleCheckBox.setChecked(setting.bundle)
         self.scr = setting.scripts
 
         self.drawScripts()
@@ -201,6 +204,9 @@ class ScriptTab(QWidget):
                 "enabled": self.ui.enableCheckBox.isChecked(),
                 "insertStub": self.ui.insertStubCheckBox.isChecked(),
                 "scripts": self.scr,
+                "coalesce": self.ui.coalesceCheckBox.isChecked(),
+                "externalizeThreshold": self.ui.externalizeSpinBox.value(),
+                "bundle": self.ui.bundleCheckBox.isChecked(),
             },
         )
         return result
@@ -16,15 +16,23 @@ class Settings(QDialog):
 
         self.layout().setSizeConstraint(QLayout.SetFixedSize)
 
-    def setupUi(self, version: str, add_assets: bool, remove_cards: bool):
+    def setupUi(
+        self,
+        version: str,
+        add_assets: bool,
+        remove_cards: bool,
+        external_assets: bool,
+    ):
         self.ui.version_info.setText(f"Asset Manager v{version}")
         self.ui.add_assets.setChecked(add_assets)
         self.ui.remove_cards.setChecked(remove_cards)
+        self.ui.external_assets.setChecked(external_assets)
 
     def accept(self):
         self.cb(
             self.ui.add_assets.isChecked(),
             self.ui.remove_cards.isChecked(),
+            self.ui.external_assets.isChecked(),
         )
 
         super().accept()
@@ -0,0 +1,83 @@
+from typing import Callable, List
+
+from aqt.qt import QDialog
+from aqt.utils import getSaveFile, restoreGeom, saveGeom, tooltip
+
+from .forms.timings_ui import Ui_Timings
+
+
+geom_name = "assetManagerTimings"
+
+
+def format_stats(stats: List[dict]) -> str:
+    if len(stats) == 0:
+        return "No timings were recorded yet. Enable recording and review some cards."
+
+    header = f"{'Probe':<36} {'Note Type':<24} {'Card Type':<20} {'Count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"
+    lines = [
+        f"{s['probe'][:36]:<36} {s['model'][:24]:<24} {s['template'][:20]:<20} {s['count']:>7} {s['p50']:>9.2f} {s['p95']:>9.2f} {s['max']:>9.2f}"
+        for s in stats
+    ]
+
+    return "\n".join([header, "-" * len(header), *lines])
+
+
+class Timings(QDialog):
+    def __init__(
+        self,
+        parent,
+        get_stats: Callable[[], List[dict]],
+        export_stats: Callable[[], str],
+        reset_stats: Callable[[], None],
+        set_recording: Callable[[bool], None],
+    ):
+        super().__init__(parent=parent)
+
+        self.get_stats = get_stats
+        self.export_stats = export_stats
+        self.reset_stats = reset_stats
+        self.set_recording = set_recording
+
+        self.ui = Ui_Timings()
+        self.ui.setupUi(self)
+
+        self.ui.refreshButton.clicked.connect(self.refresh)
+        self.ui.resetButton.clicked.connect(self.reset)
+        self.ui.exportButton.clicked.connect(self.export)
+        self.finished.connect(self.save_geom)
+
+        restoreGeom(self, geom_name)
+
+    def setupUi(self, recording: bool):
+        self.ui.recordCheckBox.setChecked(recording)
+        self.ui.recordCheckBox.toggled.connect(self.set_recording)
+
+        self.refresh()
+
+    def refresh(self):
+        self.ui.statsText.setPlainText(format_stats(self.get_stats()))
+
+    def reset(self):
+        self.reset_stats()
+        self.refresh()
+
+    def export(self):
+        filename = getSaveFile(
+            self,
+            "Export Timings",
+            "assetManagerTimings",
+            "JSON",
+            ".json",
+            "asset_manager_timings.json",
+        )
+
+        if not filename:
+            return
+
+        with open(filename, "w") as jsonfile:
+            jsonfile.write(self.export_stats())
+
+        tooltip("Exported timings")
+
+    def save_geom(self):
+        saveGeom(self, geom_name)
@@ -37,6 +37,10 @@ def script_position_to_gui_text(txt: str) -> str:
         return "Document Body"
     elif txt == "into_template":
         return "Into Template"
+    elif txt == "session":
+        return "Once per Session"
+    elif txt == "worker":
+        return "In Web Worker"
 
 
 def pos_to_script_position(pos: int) -> str:
@@ -48,3 +52,25 @@ def pos_to_script_position(pos: int) -> str:
         return "body"
     elif pos == 3:
         return "into_template"
+    elif pos == 4:
+        return "session"
+    elif pos == 5:
+        return "worker"
+
+
+def script_execution_to_gui_text(txt: str) -> str:
+    if txt == "immediate":
+        return "Immediately"
+    elif txt == "defer":
+        return "After Rendering"
+    elif txt == "idle":
+        return "When Idle"
+
+
+def pos_to_script_execution(pos: int) -> str:
+    if pos == 0:
+        return "immediate"
+    elif pos == 1:
+        return "defer"
+    elif pos == 2:
+        return "idle"
@@ -3,6 +3,7 @@ from .models import init_models_dialog
 from .addon_manager import init_addon_manager
 from .fields import init_fields
 from .editor import init_editor
+from .menu import init_menu
 
 
 def setup():
@@ -11,3 +12,4 @@ def setup():
     init_addon_manager()
     init_fields()
     init_editor()
+    init_menu()
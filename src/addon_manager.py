@@ -6,23 +6,31 @@ from aqt.utils import showInfo
 from aqt.addons import AddonsDialog
 from aqt.gui_hooks import addons_dialog_will_show
 
-from .utils import add_assets, remove_cards
+from .utils import add_assets, remove_cards, external_assets
 from .utils import version
+from .render_cache import render_cache
 
 from ..gui_config.settings import Settings
 
 
-def save_settings(addassets: bool, removecards: bool) -> None:
+def save_settings(addassets: bool, removecards: bool, externalassets: bool) -> None:
     add_assets.value = addassets
     remove_cards.value = removecards
 
+    if external_assets.value != externalassets:
+        external_assets.value = externalassets
+        # cached assets were rendered for the other mode
+        render_cache.clear()
+
 
 addons_current: Optional[AddonsDialog] = None
 
 
 def show_settings():
     settings = Settings(addons_current, save_settings)
-    settings.setupUi(version, add_assets.value, remove_cards.value)
+    settings.setupUi(
+        version, add_assets.value, remove_cards.value, external_assets.value
+    )
     settings.exec_()
 
 
@@ -1,9 +1,8 @@
-from dataclasses import asdict
-from typing import Union, Optional, List
+from typing import Union, Optional, List, Dict
+from dataclasses import replace
 
 from aqt import mw
 
-from anki.cards import Card
 from anki.models import NoteType
 
 from .config_types import (
@@ -12,6 +11,7 @@ from .config_types import (
     ConcreteScript,
     MetaScript,
     ScriptStorage,
+    Interface,
     DEFAULT_SETTING,
     DEFAULT_CONCRETE_SCRIPT,
     DEFAULT_META_SCRIPT,
@@ -23,12 +23,8 @@ from .config_types import (
 )
 
 from .lib.interface import (
-    make_setting,
-    make_script_v2,
     make_meta_script,
     make_script_storage,
-    make_html_setting,
-    make_fragment,
 )
 
 from .lib.registrar import (
@@ -41,43 +37,34 @@ from .utils import (
     html_config,
 )
 
+from .config_fields import (
+    make_field_table,
+    load_dataclass,
+    dump_dataclass,
+)
+from .render_cache import render_cache
+from .timings import timed
+
 ######################## SCRIPTS
 
 
 def deserialize_setting(model_id: int, model_setting: dict) -> ScriptSetting:
-    return make_setting(
-        model_setting["enabled"]
-        if "enabled" in model_setting
-        else DEFAULT_SETTING.enabled,
-        model_setting["insertStub"]
-        if "insertStub" in model_setting
-        else DEFAULT_SETTING.insert_stub,
-        model_setting["indentSize"]
-        if "indentSize" in model_setting
-        else DEFAULT_SETTING.indent_size,
-        add_other_metas(
-            model_id,
-            [
-                s
-                for s in [
-                    deserialize_script(script)
-                    for script in (
-                        model_setting["scripts"]
-                        if "scripts" in model_setting
-                        else DEFAULT_SETTING.scripts
-                    )
-                ]
-                if s
-            ],
+    setting = load_dataclass(script_setting_table, model_setting)
+
+    return replace(
+        setting,
+        scripts=add_other_metas(
+            model_id, [script for script in setting.scripts if script]
         ),
     )
 
 
-def should_autodelete(script: Script) -> bool:
+def should_autodelete(script: Script, interface: Optional[Interface] = None) -> bool:
     if isinstance(script, ConcreteScript):
         return False
 
-    interface = get_interface(script.tag)
+    if not interface:
+        interface = get_interface(script.tag)
 
     if isinstance(interface.autodelete, bool):
         return interface.autodelete
@@ -86,19 +73,14 @@ def should_autodelete(script: Script) -> bool:
 
 
 def add_other_metas(model_id: int, scripts: List[Script]) -> List[Script]:
-    meta_scripts = get_meta_scripts(model_id)
-
-    for ms in meta_scripts:
-        try:
-            found = next(
-                filter(
-                    lambda script: isinstance(script, MetaScript)
-                    and script.tag == ms.tag
-                    and script.id == ms.id,
-                    scripts,
-                )
-            )
-        except StopIteration:
+    stored = {
+        (script.tag, script.id)
+        for script in scripts
+        if isinstance(script, MetaScript)
+    }
+
+    for ms in get_meta_scripts(model_id):
+        if (ms.tag, ms.id) not in stored:
             # newly inserted meta scripts, which were not written to config before
             scripts.append(
                 make_meta_script(
@@ -106,168 +88,145 @@ def add_other_metas(model_id: int, scripts: List[Script]) -> List[Script]:
                     ms.id,
                 )
             )
+            stored.add((ms.tag, ms.id))
 
-    return list(filter(lambda script: not should_autodelete(script), scripts))
+    # looked up once per tag, instead of once per script
+    interfaces: Dict[str, Interface] = {}
+
+    for script in scripts:
+        if isinstance(script, MetaScript) and script.tag not in interfaces:
+            interfaces[script.tag] = get_interface(script.tag)
+
+    return [
+        script
+        for script in scripts
+        if not should_autodelete(
+            script,
+            interfaces[script.tag] if isinstance(script, MetaScript) else None,
+        )
+    ]
 
 
 def deserialize_script(script_data: dict) -> Union[ConcreteScript, MetaScript]:
     return (
         script_data
         if isinstance(script_data, Script)
-        else (
-            deserialize_concrete_script(script_data)
-            if "name" in script_data
-            else deserialize_meta_script(script_data)
+        # the tables are used directly, as this runs for every stored script
+        else load_dataclass(
+            concrete_script_table if "name" in script_data else meta_script_table,
+            script_data,
         )
     )
 
 
 def deserialize_concrete_script(script_data: dict) -> ConcreteScript:
-    return make_script_v2(
-        name=script_data["name"]
-        if "name" in script_data
-        else DEFAULT_CONCRETE_SCRIPT.name,
-        enabled=script_data["enabled"]
-        if "enabled" in script_data
-        else DEFAULT_CONCRETE_SCRIPT.enabled,
-        type=script_data["type"]
-        if "type" in script_data
-        else DEFAULT_CONCRETE_SCRIPT.type,
-        label=script_data["label"]
-        if "label" in script_data
-        else DEFAULT_CONCRETE_SCRIPT.label,
-        version=script_data["version"]
-        if "version" in script_data
-        else DEFAULT_CONCRETE_SCRIPT.version,
-        description=script_data["description"]
-        if "description" in script_data
-        else DEFAULT_CONCRETE_SCRIPT.description,
-        position=script_data["position"]
-        if "position" in script_data
-        else DEFAULT_CONCRETE_SCRIPT.position,
-        conditions=script_data["conditions"]
-        if "conditions" in script_data
-        else DEFAULT_CONCRETE_SCRIPT.conditions,
-        code=script_data["code"]
-        if "code" in script_data
-        else DEFAULT_CONCRETE_SCRIPT.code,
-    )
+    return load_dataclass(concrete_script_table, script_data)
 
 
 def deserialize_meta_script(script_data: dict) -> MetaScript:
-    result = make_meta_script(
-        script_data["tag"] if "tag" in script_data else DEFAULT_META_SCRIPT.tag,
-        script_data["id"] if "id" in script_data else DEFAULT_META_SCRIPT.id,
-        make_script_storage(
-            **script_data["storage"]
-            if "storage" in script_data
-            else DEFAULT_META_SCRIPT.storage
-        ),
-    )
-
-    return result
+    return load_dataclass(meta_script_table, script_data)
 
 
 def serialize_setting(setting: ScriptSetting) -> dict:
-    return {
-        "enabled": setting.enabled,
-        "insertStub": setting.insert_stub,
-        "indentSize": setting.indent_size,
-        "scripts": [serialize_script(script) for script in setting.scripts],
-    }
+    return dump_dataclass(script_setting_table, setting)
 
 
 def serialize_script(script: Union[ConcreteScript, MetaScript]) -> dict:
-    if isinstance(script, ConcreteScript):
-        return asdict(script)
-    else:
-        preresult = asdict(script)
-
-        return {
-            "tag": preresult["tag"],
-            "id": preresult["id"],
-            "storage": {k: v for k, v in preresult["storage"].items() if v is not None},
-        }
+    return dump_dataclass(
+        concrete_script_table
+        if isinstance(script, ConcreteScript)
+        else meta_script_table,
+        script,
+    )
 
 
 def get_setting_from_notetype(notetype) -> ScriptSetting:
-    scripts_config.model_id = notetype["id"]
-
-    return deserialize_setting(
-        scripts_config.model_id,
-        scripts_config.value,
-    )
+    # does not touch `scripts_config`, so it is safe to use from background threads
+    with timed("get_setting_from_notetype", notetype["name"]):
+        return deserialize_setting(
+            notetype["id"],
+            scripts_config.get_value(notetype),
+        )
 
 
 def maybe_get_setting_from_card(card) -> Optional[ScriptSetting]:
-    the_note = Card(mw.col, card.id).note()
-    maybe_model = the_note.model()
+    maybe_model = card.model()
+
+    if not maybe_model:
+        return None
 
-    return get_setting_from_notetype(maybe_model) if maybe_model else None
+    return get_setting_from_notetype(maybe_model)
 
 
+######################## FIELD TABLES
+
+# the lambdas defer the lookup of the functions for nested values
+concrete_script_table = make_field_table(
+    ConcreteScript,
+    DEFAULT_CONCRETE_SCRIPT,
+    validate=True,
+)
+
+script_storage_table = make_field_table(
+    ScriptStorage,
+    make_script_storage(),
+    omit_none=True,
+)
+
+meta_script_table = make_field_table(
+    MetaScript,
+    # scripts stored without a storage do not override any of its values
+    make_meta_script(DEFAULT_META_SCRIPT.tag, DEFAULT_META_SCRIPT.id),
+    load={
+        "storage": lambda storage: storage
+        if isinstance(storage, ScriptStorage)
+        else load_dataclass(script_storage_table, storage)
+    },
+    dump={"storage": lambda storage: dump_dataclass(script_storage_table, storage)},
+)
+
+script_setting_table = make_field_table(
+    ScriptSetting,
+    DEFAULT_SETTING,
+    keys={
+        "insert_stub": "insertStub",
+        "indent_size": "indentSize",
+        "externalize_threshold": "externalizeThreshold",
+    },
+    load={"scripts": lambda scripts: [deserialize_script(s) for s in scripts]},
+    dump={"scripts": lambda scripts: [serialize_script(s) for s in scripts]},
+)
+
+concrete_html_table = make_field_table(ConcreteHTML, DEFAULT_CONCRETE_HTML)
+
+html_setting_table = make_field_table(
+    HTMLSetting,
+    DEFAULT_HTML_SETTING,
+    load={"fragments": lambda fragments: [deserialize_html(f) for f in fragments]},
+    dump={"fragments": lambda fragments: [serialize_html(f) for f in fragments]},
+)
+
 ######################## HTML
 
 
 def deserialize_html_setting(_model_id: int, model_setting: dict) -> ScriptSetting:
-    return make_html_setting(
-        model_setting["enabled"]
-        if "enabled" in model_setting
-        else DEFAULT_HTML_SETTING.enabled,
-        model_setting["minify"]
-        if "minify" in model_setting
-        else DEFAULT_HTML_SETTING.minify,
-        [
-            deserialize_html(fragment)
-            for fragment in (
-                model_setting["fragments"]
-                if "fragments" in model_setting
-                else DEFAULT_HTML_SETTING.fragments
-            )
-        ],
-    )
+    return load_dataclass(html_setting_table, model_setting)
 
 
 def deserialize_html(script_data: dict) -> ConcreteHTML:
     return (
         script_data
         if isinstance(script_data, HTML)
-        else make_fragment(
-            script_data["name"]
-            if "name" in script_data
-            else DEFAULT_CONCRETE_HTML.name,
-            script_data["enabled"]
-            if "enabled" in script_data
-            else DEFAULT_CONCRETE_HTML.enabled,
-            script_data["label"]
-            if "label" in script_data
-            else DEFAULT_CONCRETE_HTML.label,
-            script_data["version"]
-            if "version" in script_data
-            else DEFAULT_CONCRETE_HTML.version,
-            script_data["description"]
-            if "description" in script_data
-            else DEFAULT_CONCRETE_HTML.description,
-            script_data["conditions"]
-            if "conditions" in script_data
-            else DEFAULT_CONCRETE_HTML.conditions,
-            script_data["code"]
-            if "code" in script_data
-            else DEFAULT_CONCRETE_HTML.code,
-        )
+        else load_dataclass(concrete_html_table, script_data)
     )
 
 
 def serialize_html_setting(setting: HTMLSetting) -> dict:
-    return {
-        "enabled": setting.enabled,
-        "minify": setting.minify,
-        "fragments": [serialize_html(script) for script in setting.fragments],
-    }
+    return dump_dataclass(html_setting_table, setting)
 
 
 def serialize_html(fragment: Union[ConcreteHTML]) -> dict:
-    return asdict(fragment)
+    return dump_dataclass(concrete_html_table, fragment)
 
 
 def get_html_setting_from_notetype(notetype: NoteType) -> HTMLSetting:
@@ -290,7 +249,11 @@ def write_html(
     elif model_id:
         html_config.model_id = model_id
 
-    html_config.value = serialize_html_setting(html)
+    serialized = serialize_html_setting(html)
+
+    # unchanged settings are not written, so the note type stays unmodified
+    if html_config.value != serialized:
+        html_config.value = serialized
 
 
 def write_scripts(
@@ -301,7 +264,10 @@ def write_scripts(
     elif model_id:
         scripts_config.model_id = model_id
 
-    scripts_config.value = serialize_setting(scripts)
+    serialized = serialize_setting(scripts)
+
+    if scripts_config.value != serialized:
+        scripts_config.value = serialized
 
 
 def write_setting(
@@ -313,3 +279,5 @@ def write_setting(
 ):
     write_html(html, model_id=model_id, custom_model=custom_model)
     write_scripts(scripts, model_id=model_id, custom_model=custom_model)
+
+    render_cache.invalidate_model(scripts_config.model_id)
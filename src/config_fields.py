@@ -0,0 +1,158 @@
+from copy import deepcopy
+from operator import itemgetter
+from typing import Any, Callable, Dict, Optional, Tuple, Union, Literal, NamedTuple
+from typing import Sequence
+from typing import get_args, get_origin
+from dataclasses import fields
+
+
+class FieldSpec(NamedTuple):
+    attribute: str
+    # key in the stored dict
+    key: str
+    default: Any
+    # allowed values of literal types, others are replaced by the default
+    choices: Optional[Tuple[Any, ...]]
+    # converts nested values
+    load: Optional[Callable[[Any], Any]]
+    dump: Optional[Callable[[Any], Any]]
+
+
+class FieldTable(NamedTuple):
+    cls: type
+    fields: Tuple[FieldSpec, ...]
+    # stored values set to None are replaced by the default, like invalid literals
+    validate: bool
+    # fields set to None are left out when dumping
+    omit_none: bool
+    # reads the values of all fields at once, raises KeyError if one is missing
+    getter: Callable[[dict], Sequence[Any]]
+    # for stored dicts with missing keys, which are filled in on top of the defaults
+    defaults: Tuple[Any, ...]
+    indices: Dict[str, int]
+    # indices of the fields with choices, and with load functions
+    checks: Tuple[Tuple[int, Tuple[Any, ...]], ...]
+    loads: Tuple[Tuple[int, Callable[[Any], Any]], ...]
+
+
+def literal_choices(annotation) -> Optional[Tuple[Any, ...]]:
+    if get_origin(annotation) is Literal:
+        return get_args(annotation)
+
+    elif get_origin(annotation) is Union:
+        nested = [literal_choices(arg) for arg in get_args(annotation)]
+
+        if all(choices is not None for choices in nested):
+            return tuple(choice for choices in nested for choice in choices)
+
+    return None
+
+
+def make_field_table(
+    cls: type,
+    default: Any,
+    keys: Optional[Dict[str, str]] = None,
+    load: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    dump: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    validate: bool = False,
+    omit_none: bool = False,
+) -> FieldTable:
+    """Generates the table from the fields of the dataclass,
+    `keys` renames fields in the stored dict, `validate` checks the stored values"""
+    keys = keys or {}
+    load = load or {}
+    dump = dump or {}
+
+    specs = tuple(
+        FieldSpec(
+            field.name,
+            keys.get(field.name, field.name),
+            getattr(default, field.name),
+            literal_choices(field.type) if validate else None,
+            load.get(field.name),
+            dump.get(field.name),
+        )
+        for field in fields(cls)
+    )
+
+    keys = [spec.key for spec in specs]
+
+    return FieldTable(
+        cls,
+        specs,
+        validate,
+        omit_none,
+        itemgetter(*keys) if len(keys) > 1 else lambda stored: (stored[keys[0]],),
+        tuple(spec.default for spec in specs),
+        {spec.key: idx for idx, spec in enumerate(specs)},
+        tuple((idx, spec.choices) for idx, spec in enumerate(specs) if spec.choices),
+        tuple((idx, spec.load) for idx, spec in enumerate(specs) if spec.load),
+    )
+
+
+def repair_values(table: FieldTable, values: Sequence[Any]) -> Sequence[Any]:
+    return [
+        spec.default
+        if value is None or (spec.choices is not None and value not in spec.choices)
+        else value
+        for spec, value in zip(table.fields, values)
+    ]
+
+
+def load_dataclass(table: FieldTable, stored: dict) -> Any:
+    """Missing values are replaced by the default, and invalid ones if validated"""
+    values = None
+
+    if not table.omit_none:
+        # dicts written by `dump_dataclass` have all keys, unless None is omitted
+        try:
+            values = table.getter(stored)
+        except KeyError:
+            pass
+
+    if values is None:
+        values = list(table.defaults)
+        indices = table.indices
+
+        # cheaper than looking up every field, as most keys are usually missing
+        for key, value in stored.items():
+            if key in indices:
+                values[indices[key]] = value
+
+    if table.validate:
+        if None in values:
+            values = repair_values(table, values)
+        else:
+            for idx, choices in table.checks:
+                if values[idx] not in choices:
+                    values = repair_values(table, values)
+                    break
+
+    if table.loads:
+        values = list(values)
+
+        for idx, load in table.loads:
+            values[idx] = load(values[idx])
+
+    # positional arguments are faster than keywords
+    return table.cls(*values)
+
+
+def dump_dataclass(table: FieldTable, instance: Any) -> dict:
+    """Like `asdict`, lists are copied, so the stored dict can be changed freely"""
+    stored = {}
+
+    for spec in table.fields:
+        value = getattr(instance, spec.attribute)
+
+        if table.omit_none and value is None:
+            continue
+
+        if spec.dump:
+            value = spec.dump(value)
+        elif isinstance(value, list):
+            value = deepcopy(value)
+
+        stored[spec.key] = value
+
+    return stored
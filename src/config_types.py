@@ -1,12 +1,13 @@
 from typing import Optional, Callable, Union, List, Literal
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
 ################################ simple types
 
 ScriptType = Literal["js", "esm", "css"]
 
 Position = Literal["external", "head", "body"]
-ScriptPosition = Union[Position, Literal["into_template"]]
+ScriptPosition = Union[Position, Literal["into_template", "session", "worker"]]
+ExecutionMode = Literal["immediate", "defer", "idle"]
 
 AnkiFmt = Literal["qfmt", "afmt"]
 Fmt = Literal["question", "answer"]
@@ -23,6 +24,8 @@ ScriptKeys = Literal[
     "position",
     "conditions",
     "code",
+    "execution",
+    "lazy",
 ]
 
 LabelText = str
@@ -31,15 +34,48 @@ AnkiTmpl = str
 
 Falsifiable = lambda t: Union[Literal[False], t]
 
+################################ slots
+
+
+def _get_slots_state(self) -> list:
+    return [getattr(self, field.name) for field in fields(self)]
+
+
+def _set_slots_state(self, state: list) -> None:
+    # frozen dataclasses cannot use `setattr`
+    for field, value in zip(fields(self), state):
+        object.__setattr__(self, field.name, value)
+
+
+def add_slots(cls: type) -> type:
+    """Recreates a dataclass without a `__dict__` per instance,
+    `dataclass(slots=True)` needs Python 3.10"""
+    field_names = tuple(field.name for field in fields(cls))
+
+    namespace = {
+        key: value
+        for key, value in cls.__dict__.items()
+        # defaults are kept by the generated `__init__`
+        if key not in [*field_names, "__dict__", "__weakref__"]
+    }
+    namespace["__slots__"] = field_names
+    # pickling and copying would otherwise try to set the frozen fields
+    namespace["__getstate__"] = _get_slots_state
+    namespace["__setstate__"] = _set_slots_state
+
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
 ################################ for scripts
 
 dataclass(frozen=True)
 
 
 class Script:
-    pass
+    __slots__ = ()
 
 
+@add_slots
 @dataclass(frozen=True)
 class ConcreteScript(Script):
     name: str
@@ -51,8 +87,12 @@ class ConcreteScript(Script):
     position: ScriptPosition
     conditions: list
     code: str
+    execution: ExecutionMode = "immediate"
+    # css selector or "interaction", only for scripts which are loaded from files
+    lazy: str = ""
 
 
+@add_slots
 @dataclass(frozen=True)
 class ScriptStorage:
     name: Optional[str]
@@ -64,8 +104,11 @@ class ScriptStorage:
     position: Optional[ScriptPosition]
     conditions: Optional[list]
     code: Optional[str]
+    execution: Optional[ExecutionMode] = None
+    lazy: Optional[str] = None
 
 
+@add_slots
 @dataclass(frozen=True)
 class MetaScript(Script):
     tag: str
@@ -73,12 +116,19 @@ class MetaScript(Script):
     storage: ScriptStorage
 
 
+@add_slots
 @dataclass(frozen=True)
 class ScriptSetting:
     enabled: bool
     insert_stub: bool
     indent_size: int
     scripts: List[Script]
+    # merge inline scripts into one element per side
+    coalesce: bool = False
+    # inline scripts larger than this many bytes are moved to files, 0 disables it
+    externalize_threshold: int = 0
+    # compile the scripts of the templates into one file per note type
+    bundle: bool = False
 
 
 ################################ for interfaces
@@ -95,6 +145,8 @@ class ScriptBool:
     position: bool
     conditions: bool
     code: bool
+    execution: bool = False
+    lazy: bool = False
 
 
 @dataclass(frozen=True)
@@ -133,6 +185,8 @@ DEFAULT_CONCRETE_SCRIPT = ConcreteScript(
     "into_template",
     [],
     "console.log('Hello, World!')",
+    "immediate",
+    "",
 )
 
 DEFAULT_META_SCRIPT = MetaScript(
@@ -161,9 +215,10 @@ dataclass(frozen=True)
 
 
 class HTML:
-    pass
+    __slots__ = ()
 
 
+@add_slots
 @dataclass(frozen=True)
 class ConcreteHTML(HTML):
     name: str
@@ -186,6 +241,7 @@ class HTMLBool(HTML):
     code: bool
 
 
+@add_slots
 @dataclass(frozen=True)
 class HTMLSetting:
     enabled: bool
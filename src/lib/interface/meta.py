@@ -4,6 +4,7 @@ from dataclasses import replace
 from ...config_types import (
     Falsifiable,
     ScriptType,
+    ExecutionMode,
     ScriptStorage,
     ScriptBool,
     ScriptKeys,
@@ -28,6 +29,8 @@ def make_script_storage(
     position: Optional[list] = None,
     conditions: Optional[list] = None,
     code: Optional[str] = None,
+    execution: Optional[ExecutionMode] = None,
+    lazy: Optional[str] = None,
 ) -> ScriptStorage:
     return ScriptStorage(
         name,
@@ -39,6 +42,8 @@ def make_script_storage(
         position,
         conditions,
         code,
+        execution,
+        lazy,
     )
 
 
@@ -52,6 +57,8 @@ def make_script_bool(
     position: Optional[bool] = None,
     conditions: Optional[bool] = None,
     code: Optional[bool] = None,
+    execution: Optional[bool] = None,
+    lazy: Optional[bool] = None,
 ) -> ScriptBool:
     return ScriptBool(
         name if name is not None else False,
@@ -63,6 +70,8 @@ def make_script_bool(
         position if position is not None else False,
         conditions if conditions is not None else False,
         code if code is not None else False,
+        execution if execution is not None else False,
+        lazy if lazy is not None else False,
     )
 
 
@@ -5,6 +5,8 @@ from ...config_types import (
     ConcreteScript,
     ScriptType,
     ScriptPosition,
+    ExecutionMode,
+    DEFAULT_SETTING,
     DEFAULT_CONCRETE_SCRIPT,
 )
 
@@ -14,12 +16,18 @@ def make_setting(
     insert_stub: bool,
     indent_size: int,
     scripts: list,
+    coalesce: bool = DEFAULT_SETTING.coalesce,
+    externalize_threshold: int = DEFAULT_SETTING.externalize_threshold,
+    bundle: bool = DEFAULT_SETTING.bundle,
 ) -> ScriptSetting:
     return ScriptSetting(
         enabled,
         insert_stub,
         indent_size,
         scripts,
+        coalesce,
+        externalize_threshold,
+        bundle,
     )
 
 
@@ -56,9 +64,12 @@ def make_script_v2(
     position: ScriptPosition = DEFAULT_CONCRETE_SCRIPT.position,
     conditions: list = DEFAULT_CONCRETE_SCRIPT.conditions,
     code: str = DEFAULT_CONCRETE_SCRIPT.code,
+    execution: ExecutionMode = DEFAULT_CONCRETE_SCRIPT.execution,
+    lazy: str = DEFAULT_CONCRETE_SCRIPT.lazy,
 ) -> ConcreteScript:
     possible_types = ["js", "esm", "css"]
-    possible_positions = ["external", "head", "body", "into_template"]
+    possible_positions = ["external", "head", "body", "into_template", "session", "worker"]
+    possible_executions = ["immediate", "defer", "idle"]
 
     return ConcreteScript(
         name if name is not None else DEFAULT_CONCRETE_SCRIPT.name,
@@ -72,4 +83,8 @@ def make_script_v2(
         else DEFAULT_CONCRETE_SCRIPT.position,
         conditions if conditions is not None else DEFAULT_CONCRETE_SCRIPT.conditions,
         code if code is not None else DEFAULT_CONCRETE_SCRIPT.code,
+        execution
+        if execution in possible_executions
+        else DEFAULT_CONCRETE_SCRIPT.execution,
+        lazy if lazy is not None else DEFAULT_CONCRETE_SCRIPT.lazy,
     )
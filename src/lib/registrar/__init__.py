@@ -19,3 +19,5 @@ from .meta import (
     get_meta_script,
     has_meta_script,
 )
+
+from .generation import get_registry_generation
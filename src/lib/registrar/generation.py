@@ -0,0 +1,12 @@
+_generation: int = 0
+
+
+def bump_registry_generation() -> None:
+    global _generation
+    _generation += 1
+
+
+def get_registry_generation() -> int:
+    """Is incremented whenever an interface, meta script, or reducer is (de)registered"""
+
+    return _generation
@@ -15,6 +15,8 @@ from ...config_types import (
 
 from ..interface import make_interface, make_script_v2
 
+from .generation import bump_registry_generation
+
 
 _meta_interfaces: List[Interface] = []
 
@@ -54,6 +56,7 @@ def make_and_register_interface(
 
 def register_interface(iface: Interface) -> None:
     _meta_interfaces.append(iface)
+    bump_registry_generation()
 
 
 loose_script = make_script_v2(
@@ -66,6 +69,8 @@ loose_script = make_script_v2(
     position="into_template",
     conditions=[],
     code="",
+    execution="immediate",
+    lazy="",
 )
 
 all_attributes = [
@@ -78,6 +83,8 @@ all_attributes = [
     "position",
     "conditions",
     "code",
+    "execution",
+    "lazy",
 ]
 
 
@@ -104,6 +111,10 @@ def _make_loose_interface(tag: str) -> Interface:
             if storage.conditions is not None
             else loose_script.conditions,
             code=storage.code if storage.code is not None else loose_script.code,
+            execution=storage.execution
+            if storage.execution is not None
+            else loose_script.execution,
+            lazy=storage.lazy if storage.lazy is not None else loose_script.lazy,
         ),
         setter=lambda id, script: False,
         generator=lambda id, storage, model, tmpl, pos: "",
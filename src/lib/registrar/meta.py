@@ -5,6 +5,7 @@ from ...config_types import (
 )
 
 from .iface import has_interface
+from .generation import bump_registry_generation
 
 
 _meta_scripts: List[Tuple[str, MetaScript]] = []
@@ -28,6 +29,7 @@ def register_meta_script(model_id: ModelId, meta_script: MetaScript) -> None:
                 meta_script,
             )
         )
+        bump_registry_generation()
     else:
         raise InterfaceIsNotRegistered(
             "You tried to register a meta script for a non existing interface. "
@@ -52,6 +54,7 @@ def deregister_meta_script(model_id: ModelId, meta_script: MetaScript) -> bool:
             )
 
             _meta_scripts.pop(found[0])
+            bump_registry_generation()
             return True
 
         except StopIteration:
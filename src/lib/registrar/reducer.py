@@ -7,6 +7,8 @@ from ...config_types import (
 
 from ..interface import make_reducer
 
+from .generation import bump_registry_generation
+
 
 _label_reducers: List[LabelReducer] = []
 
@@ -25,6 +27,7 @@ def make_and_register_reducer(
 
 def register_reducer(redux: LabelReducer) -> None:
     _label_reducers.append(redux)
+    bump_registry_generation()
 
 
 def get_reducer(label: str) -> LabelReducer:
@@ -1,25 +1,73 @@
 from re import match
 from os import listdir
+from os.path import join
+from hashlib import sha1
+from typing import Dict, Tuple, List, Optional
 
 from aqt import mw
 
-from .config_types import ScriptSetting
-from .stringify import stringify_for_external
+from .config_types import ScriptSetting, AnkiFmt
+from .stringify import stringify_for_external, ExternalizedScript
 
 
-def write_media(model_id: int, setting: ScriptSetting):
-    needs_saving = False
+Externalized = Dict[Tuple[str, AnkiFmt], List[ExternalizedScript]]
+
+
+def get_file_hash(path: str) -> str:
+    with open(path, "rb") as file:
+        return sha1(file.read()).hexdigest()
+
+
+def write_media(
+    model_id: int, setting: ScriptSetting, externalized: Optional[Externalized] = None
+):
+    """Only writes files which are new or changed, and trashes files no longer used"""
     model = mw.col.models.get(model_id)
 
-    external_scripts = stringify_for_external(
-        setting,
-        model["name"],
-        model_id,
-    )
+    files = {
+        script[0]: script[1].encode()
+        for script in stringify_for_external(
+            setting,
+            model["name"],
+            model_id,
+            [template["name"] for template in model["tmpls"]],
+        )
+    }
+
+    # inline scripts which were moved out of the templates by `setup_model`
+    for scripts in (externalized or {}).values():
+        for script in scripts:
+            files[script.filename] = script.code.encode()
 
+    media_dir = mw.col.media.dir()
     prefix_regex = f"^_am_{model_id}_"
-    files = [file for file in listdir(mw.col.media.dir()) if match(prefix_regex, file)]
-    mw.col.media.trash_files(files)
+    existing = [file for file in listdir(media_dir) if match(prefix_regex, file)]
+
+    unchanged = [
+        file
+        for file in existing
+        if file in files
+        and get_file_hash(join(media_dir, file)) == sha1(files[file]).hexdigest()
+    ]
+
+    # changed files are trashed as well, otherwise anki would write them under a new name
+    mw.col.media.trash_files([file for file in existing if file not in unchanged])
+
+    for filename, data in files.items():
+        if filename not in unchanged:
+            mw.col.media.write_data(filename, data)
+
+
+def format_externalized(externalized: Externalized) -> Optional[str]:
+    lines = [
+        f"{template_name} ({'front' if fmt == 'qfmt' else 'back'}): "
+        f"{sum(script.saved for script in scripts) / 1024:.1f} kB less "
+        f"in {len(scripts)} {'script' if len(scripts) == 1 else 'scripts'}"
+        for (template_name, fmt), scripts in externalized.items()
+        if len(scripts) > 0
+    ]
+
+    if len(lines) == 0:
+        return None
 
-    for script in external_scripts:
-        mw.col.media.write_data(script[0], script[1].encode())
+    return "\n".join(["Moved large scripts out of the templates:", *lines])
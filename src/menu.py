@@ -0,0 +1,52 @@
+from aqt import mw
+from aqt.qt import QAction
+
+from .timings import get_timing_stats, export_timing_stats, reset_timings
+from .script_profile import (
+    get_script_profile,
+    export_script_profile,
+    reset_script_profile,
+)
+from .utils import profile_scripts, record_timings
+
+from ..gui_config.timings import Timings
+from ..gui_config.script_profile import ScriptProfile
+
+
+def set_recording(enabled: bool):
+    record_timings.value = enabled
+
+
+def show_timings():
+    timings = Timings(
+        mw, get_timing_stats, export_timing_stats, reset_timings, set_recording
+    )
+    timings.setupUi(record_timings.value)
+    timings.show()
+
+
+def set_profiling(enabled: bool):
+    profile_scripts.value = enabled
+
+
+def show_script_profile():
+    script_profile = ScriptProfile(
+        mw,
+        get_script_profile,
+        export_script_profile,
+        reset_script_profile,
+        set_profiling,
+    )
+    script_profile.setupUi(profile_scripts.value)
+    script_profile.show()
+
+
+def init_menu():
+    timings_action = QAction("Asset Manager Timings...", mw)
+    timings_action.triggered.connect(show_timings)
+
+    profile_action = QAction("Asset Manager Script Profile...", mw)
+    profile_action.triggered.connect(show_script_profile)
+
+    mw.form.menuTools.addAction(timings_action)
+    mw.form.menuTools.addAction(profile_action)
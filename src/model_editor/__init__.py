@@ -1,11 +1,28 @@
-from ..config_types import HTMLSetting, ScriptSetting
+from typing import Dict, Tuple, List, Callable
+
+from ..config_types import HTMLSetting, ScriptSetting, AnkiFmt
+from ..stringify import ExternalizedScript
+from ..render_cache import render_cache
 
 from .setup_scripts import setup_with_only_scripts
 from .setup_html import setup_full
 
 
-def setup_model(model_id: int, html: HTMLSetting, scripts: ScriptSetting):
-    if html.enabled:
-        setup_full(model_id, html, scripts)
-    else:
-        setup_with_only_scripts(model_id, scripts)
+def setup_model(
+    model_id: int,
+    html: HTMLSetting,
+    scripts: ScriptSetting,
+    callback: Callable[[], None],
+) -> Dict[Tuple[str, AnkiFmt], List[ExternalizedScript]]:
+    """Only changes the templates of the note type without saving it,
+    `callback` is called once they are written, which can be after minification.
+    Returns the scripts which were moved out of each template"""
+    externalized = (
+        setup_full(model_id, html, scripts, callback)
+        if html.enabled
+        else setup_with_only_scripts(model_id, scripts, callback)
+    )
+
+    render_cache.invalidate_model(model_id)
+
+    return externalized
@@ -1,7 +1,21 @@
+import re
+
 from anki.models import NoteType
 
 from ..config_types import AnkiFmt
 
 
 def write_model_template(template: NoteType, fmt: AnkiFmt, value: str) -> bool:
+    """Returns whether the template changed"""
+    if template[fmt] == value:
+        return False
+
     template[fmt] = value
+    return True
+
+
+front_side_regex = re.compile(r"\{\{\s*FrontSide\s*\}\}")
+
+
+def includes_front_side(text: str) -> bool:
+    return bool(re.search(front_side_regex, text))
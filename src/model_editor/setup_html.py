@@ -1,12 +1,17 @@
 import re
-from typing import List, Optional, Tuple, Callable
+from typing import List, Optional, Tuple, Callable, Dict
 
 from aqt import mw
 from anki.models import NoteType
 
-from ..config_types import HTML, HTMLSetting, ScriptSetting
-from ..stringify import stringify_for_template, get_condition_parser
+from ..config_types import HTML, HTMLSetting, ScriptSetting, AnkiFmt
+from ..stringify import (
+    stringify_for_template,
+    get_condition_parser,
+    ExternalizedScript,
+)
 
+from .common import includes_front_side
 from .minify import insert_minified, insert_unminified
 
 
@@ -86,7 +91,13 @@ def get_tag_arguments(text: Optional[str]) -> List[str]:
 
 
 def get_special_parser(
-    scripts, model: NoteType, cardtype_name: str, idx: int, position: str
+    scripts,
+    model: NoteType,
+    cardtype_name: str,
+    idx: int,
+    position: str,
+    front_side: bool,
+    externalized: List[ExternalizedScript],
 ) -> Callable[[str], str]:
     def inner_parser(keyword: str) -> str:
         if keyword == "idx":
@@ -102,6 +113,9 @@ def get_special_parser(
                 model["id"],
                 cardtype_name,
                 position,
+                front_side,
+                externalized,
+                [template["name"] for template in model["tmpls"]],
             )
 
         return ""
@@ -177,9 +191,15 @@ def evaluate_fragment(
     return text
 
 
-def setup_full(model_id: int, html: HTMLSetting, scripts: ScriptSetting):
+def setup_full(
+    model_id: int,
+    html: HTMLSetting,
+    scripts: ScriptSetting,
+    callback: Callable[[], None],
+) -> Dict[Tuple[str, AnkiFmt], List[ExternalizedScript]]:
     template_fmts = []
     unminifieds = []
+    externalized = {}
     model = mw.col.models.get(model_id)
 
     for idx, template in enumerate(model["tmpls"]):
@@ -187,14 +207,31 @@ def setup_full(model_id: int, html: HTMLSetting, scripts: ScriptSetting):
         # I use question and answer
         cardtype_name = template["name"]
 
+        # scripts are left out while checking, they cannot include the question side
+        front_side = includes_front_side(
+            evaluate_fragment(
+                html.fragments,
+                "Back",
+                get_condition_parser(cardtype_name, "answer"),
+                lambda _keyword: "",
+            )
+        )
+
         for fmt in ["qfmt", "afmt"]:
             entrance = "Front" if fmt == "qfmt" else "Back"
 
             position = "question" if fmt == "qfmt" else "answer"
             cond_parser = get_condition_parser(cardtype_name, position)
+            externalized[(cardtype_name, fmt)] = []
 
             special_parser = get_special_parser(
-                scripts, model, cardtype_name, idx + 1, position
+                scripts,
+                model,
+                cardtype_name,
+                idx + 1,
+                position,
+                front_side,
+                externalized[(cardtype_name, fmt)],
             )
 
             if unminified := evaluate_fragment(
@@ -205,4 +242,6 @@ def setup_full(model_id: int, html: HTMLSetting, scripts: ScriptSetting):
                 unminifieds.append(unminified)
 
     insert = insert_minified if html.minify else insert_unminified
-    insert(unminifieds, template_fmts, lambda: mw.col.models.save(model, True))
+    insert(unminifieds, template_fmts, callback)
+
+    return externalized
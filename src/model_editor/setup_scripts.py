@@ -1,13 +1,13 @@
 import re
 
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Dict, List, Callable
 
 from aqt import mw
 
 from ..config_types import ScriptSetting, AnkiFmt
-from ..stringify import stringify_for_template
+from ..stringify import stringify_for_template, ExternalizedScript
 
-from .common import write_model_template
+from .common import write_model_template, includes_front_side
 
 startpos_regex = re.compile(r'\n?\n? *?<div.*?id="anki\-am".*?>', re.MULTILINE)
 endpos_regex = re.compile(r"</div> *?$", re.MULTILINE)
@@ -51,21 +51,27 @@ def update_model_template(template: object, fmt: AnkiFmt, script_string: str) ->
     new_template = get_new_template(slice, template[fmt], script_string)
 
     if new_template:
-        write_model_template(template, fmt, new_template)
-        return True
+        return write_model_template(template, fmt, new_template)
 
     return False
 
 
-def setup_with_only_scripts(model_id: int, scripts: ScriptSetting) -> None:
-    needs_saving = False
+def setup_with_only_scripts(
+    model_id: int, scripts: ScriptSetting, callback: Callable[[], None]
+) -> Dict[Tuple[str, AnkiFmt], List[ExternalizedScript]]:
+    externalized = {}
     model = mw.col.models.get(model_id)
+    cardtype_names = [template["name"] for template in model["tmpls"]]
 
     for template in model["tmpls"]:
+        front_side = includes_front_side(template["afmt"])
+
         # anki uses qfmt and afmt in model objects
         # I use question and answer
         for fmt in ["qfmt", "afmt"]:
-            did_insert = update_model_template(
+            externalized[(template["name"], fmt)] = []
+
+            update_model_template(
                 template,
                 fmt,
                 stringify_for_template(
@@ -74,11 +80,12 @@ def setup_with_only_scripts(model_id: int, scripts: ScriptSetting) -> None:
                     model_id,
                     template["name"],
                     "question" if fmt == "qfmt" else "answer",
+                    front_side,
+                    externalized[(template["name"], fmt)],
+                    cardtype_names,
                 ),
             )
 
-            needs_saving = needs_saving or did_insert
+    callback()
 
-    # notify anki that models changed (for synchronization e.g.)
-    if needs_saving:
-        mw.col.models.save(model, True)
+    return externalized
@@ -1,4 +1,10 @@
+import json
+
+from hashlib import sha1
+
+from aqt import mw
 from aqt.qt import QDialog
+from aqt.utils import tooltip
 from aqt.models import Models
 from aqt.gui_hooks import models_did_init_buttons
 
@@ -13,14 +19,41 @@ from .config import (
 )
 
 from .model_editor import setup_model
-from .media_writer import write_media
+from .media_writer import write_media, format_externalized
+from .render_plan import write_plan
+from .utils import scripts_config, html_config, plan_config
+
+
+def get_model_fingerprint(model: NoteType) -> str:
+    """Hash of everything in the note type that is changed by writing back"""
+    hashed = sha1()
+
+    for template in model["tmpls"]:
+        hashed.update(json.dumps([template["qfmt"], template["afmt"]]).encode())
+
+    for config in [scripts_config, html_config, plan_config]:
+        hashed.update(json.dumps(config.get_value(model), sort_keys=True).encode())
+
+    return hashed.hexdigest()
 
 
 def write_back(model_id: int, html_data, script_data) -> None:
+    model = mw.col.models.get(model_id)
+    fingerprint = get_model_fingerprint(model)
+
     write_setting(html_data, script_data, model_id=model_id)
+    write_plan(model_id, script_data)
+
+    def save_if_changed():
+        # saving bumps the modification time, which makes anki sync the whole note type
+        if get_model_fingerprint(model) != fingerprint:
+            mw.col.models.save(model, True)
+
+    externalized = setup_model(model_id, html_data, script_data, save_if_changed)
+    write_media(model_id, script_data, externalized)
 
-    setup_model(model_id, html_data, script_data)
-    write_media(model_id, script_data)
+    if report := format_externalized(externalized):
+        tooltip(report, period=6000)
 
 
 def save(model_id: int, html_data, script_data):
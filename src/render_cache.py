@@ -0,0 +1,82 @@
+from typing import Optional, Tuple, NamedTuple
+from collections import OrderedDict
+from threading import RLock
+
+from .config_types import ScriptType
+from .lib.registrar import get_registry_generation
+
+
+# model id, model mtime, template name
+RenderKey = Tuple[int, int, str]
+
+
+class Asset(NamedTuple):
+    # hash of the code, identifies the script within a page
+    key: str
+    # decides whether it is loaded as a classic script, a module, or a style
+    type: ScriptType
+    code: str
+    # url if the code is served as a file
+    src: Optional[str]
+
+
+class RenderedAssets(NamedTuple):
+    head: Tuple[Asset, ...]
+    body: Tuple[Asset, ...]
+
+
+class RenderCache:
+    """Bounded LRU cache for the assets injected into the reviewer webview"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.generation = get_registry_generation()
+        self.entries: OrderedDict = OrderedDict()
+        # entries are also filled from background threads
+        self.lock = RLock()
+
+    def _check_generation(self) -> None:
+        # registered interfaces, meta scripts, or reducers changed
+        current = get_registry_generation()
+
+        if current != self.generation:
+            self.entries.clear()
+            self.generation = current
+
+    def get(self, key: RenderKey) -> Optional[RenderedAssets]:
+        with self.lock:
+            self._check_generation()
+
+            try:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            except KeyError:
+                return None
+
+    def put(
+        self, key: RenderKey, assets: RenderedAssets, generation: Optional[int] = None
+    ) -> None:
+        with self.lock:
+            self._check_generation()
+
+            if generation is not None and generation != self.generation:
+                # was rendered before the registry changed
+                return
+
+            self.entries[key] = assets
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate_model(self, model_id: int) -> None:
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == model_id]:
+                del self.entries[key]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+render_cache = RenderCache(256)
@@ -0,0 +1,104 @@
+import json
+
+from hashlib import sha1
+from typing import Optional, List, Tuple
+
+from anki.models import NoteType
+
+from .config_types import ScriptSetting, ScriptType
+from .lib.registrar import get_meta_scripts, has_interface
+from .stringify import stringify_head_scripts, stringify_body_scripts
+from .utils import version, scripts_config, plan_config
+
+
+# changed whenever the layout of the stored plan changes
+plan_format = "2"
+
+
+def get_registry_fingerprint(model_id: int) -> str:
+    return "|".join(
+        sorted(
+            [
+                f"{ms.tag}:{ms.id}:{has_interface(ms.tag)}"
+                for ms in get_meta_scripts(model_id)
+            ]
+        )
+    )
+
+
+def get_plan_hash(model_id: int, raw_setting: dict) -> str:
+    """Identifies the stored setting together with the registered interfaces"""
+
+    # only content is hashed: the registry generation changes whenever a profile
+    # registers its meta scripts, while the plan, like the templates, stays
+    # until the next write back
+    hashed = sha1(f"{version}:{plan_format}".encode())
+    hashed.update(json.dumps(raw_setting, sort_keys=True).encode())
+    hashed.update(get_registry_fingerprint(model_id).encode())
+
+    return hashed.hexdigest()
+
+
+def compile_plan(model: NoteType, setting: ScriptSetting, plan_hash: str) -> dict:
+    templates = {}
+
+    for template in model["tmpls"]:
+        outputs = {
+            "head": stringify_head_scripts(
+                setting,
+                model["name"],
+                model["id"],
+                template["name"],
+            ),
+            "body": stringify_body_scripts(
+                setting,
+                model["name"],
+                model["id"],
+                template["name"],
+            ),
+        }
+
+        # empty outputs are left out to keep the note type small
+        templates[template["name"]] = {k: v for k, v in outputs.items() if v}
+
+    return {
+        "hash": plan_hash,
+        "templates": templates,
+    }
+
+
+def write_plan(model_id: int, setting: ScriptSetting) -> None:
+    """Needs to be called after the setting itself was written to the note type"""
+    scripts_config.model_id = model_id
+    plan_config.model = scripts_config.model
+
+    plan = compile_plan(
+        scripts_config.model,
+        setting,
+        get_plan_hash(model_id, scripts_config.value),
+    )
+
+    # generated scripts can change without the hash, so the contents are compared
+    if plan_config.value != plan:
+        plan_config.value = plan
+
+
+def get_planned_scripts(
+    model: NoteType, template_name: str
+) -> Optional[Tuple[List[Tuple[ScriptType, str]], List[Tuple[ScriptType, str]]]]:
+    """Head and body scripts are stored as pairs of their type and code"""
+    plan = plan_config.get_value(model)
+
+    if "hash" not in plan or template_name not in plan["templates"]:
+        return None
+
+    if plan["hash"] != get_plan_hash(model["id"], scripts_config.get_value(model)):
+        # setting or registered interfaces changed since the last write back
+        return None
+
+    outputs = plan["templates"][template_name]
+
+    return (
+        outputs["head"] if "head" in outputs else [],
+        outputs["body"] if "body" in outputs else [],
+    )
@@ -0,0 +1,61 @@
+import json
+
+from typing import Dict, List, Tuple
+from threading import Lock
+
+
+# note type name, card type name, script name
+ProfileKey = Tuple[str, str, str]
+
+_entries: Dict[ProfileKey, dict] = {}
+_lock = Lock()
+
+
+def record_script_profile(payload: str) -> None:
+    """Adds the entries flushed by the profiler of a webview"""
+
+    with _lock:
+        for profile_id, flushed in json.loads(payload).items():
+            model, template, script = json.loads(profile_id)
+            key = (model or "", template or "", script or "")
+
+            if key not in _entries:
+                _entries[key] = {"loads": 0, "runs": 0, "total": 0.0, "max": 0.0}
+
+            entry = _entries[key]
+            entry["loads"] += flushed["loads"]
+            entry["runs"] += flushed["runs"]
+            entry["total"] += flushed["total"]
+            entry["max"] = max(entry["max"], flushed["max"])
+
+
+def get_script_profile() -> List[dict]:
+    """Durations are in milliseconds, the slowest scripts of each note type come first"""
+
+    with _lock:
+        items = [(key, dict(entry)) for key, entry in _entries.items()]
+
+    return [
+        {
+            "model": model,
+            "template": template,
+            "script": script,
+            "loads": entry["loads"],
+            "runs": entry["runs"],
+            "total": entry["total"],
+            "mean": entry["total"] / entry["runs"] if entry["runs"] > 0 else 0.0,
+            "max": entry["max"],
+        }
+        for (model, template, script), entry in sorted(
+            items, key=lambda item: (item[0][0], -item[1]["total"])
+        )
+    ]
+
+
+def export_script_profile() -> str:
+    return json.dumps(get_script_profile(), indent=2)
+
+
+def reset_script_profile() -> None:
+    with _lock:
+        _entries.clear()
@@ -1,39 +1,121 @@
-from typing import List
+from typing import List, Optional, Tuple
 from dataclasses import replace
 
-from ..config_types import ScriptSetting, Fmt
+from ..config_types import ScriptSetting, ScriptType, Fmt
 from ..utils import version
 from ..lib.registrar import get_reducer
 
-from .stringify import stringify_setting, encapsulate_scripts
-from .prevent_reinclusion import get_prevent_reinclusion
+from .stringify import (
+    stringify_setting,
+    stringify_assets,
+    encapsulate_scripts,
+    get_preloaded_files,
+    get_shared_script_data,
+    get_module_files,
+    ExternalizedScript,
+)
+from .prevent_reinclusion import get_prevent_reinclusion, get_guard_key, answer_marker
+from .preload_hints import get_preload_hints
+from .bundle import get_bundle, get_bundle_element
 from .condition_parser import get_condition_parser
 from .groupify import groupify_external
 
 
-def stringify_for_template(
+def stringify_template_scripts(
     setting: ScriptSetting,
     model_name: str,
     model_id: int,
     cardtype_name: str,
     fmt: Fmt,
-) -> str:
+    front_side: bool,
+    externalized: Optional[List[ExternalizedScript]],
+    bundled: bool = False,
+) -> List[str]:
+    guard_key = (
+        get_guard_key(setting)
+        if not setting.insert_stub and fmt == "question"
+        else None
+    )
+
+    modules = get_module_files(setting, model_name, model_id)
+    shared = (
+        get_shared_script_data(setting, model_name, model_id, cardtype_name, modules)
+        if front_side
+        else []
+    )
+
     stringified_scripts = stringify_setting(
         setting,
         model_name,
         model_id,
         cardtype_name,
         fmt,
+        guard_key,
+        shared,
+        externalized,
+        modules,
+        bundled,
     )
 
-    if not setting.insert_stub and fmt == "question":
-        stringified_scripts.insert(0, get_prevent_reinclusion(setting.indent_size))
+    # nothing is left to guard when the bundle runs all scripts
+    if guard_key and not (bundled and len(stringified_scripts) == 0):
+        stringified_scripts.insert(
+            0, get_prevent_reinclusion(setting.indent_size, guard_key)
+        )
+
+    return stringified_scripts
+
+
+def stringify_for_template(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_name: str,
+    fmt: Fmt,
+    front_side: bool = False,
+    externalized: Optional[List[ExternalizedScript]] = None,
+    cardtype_names: Optional[List[str]] = None,
+) -> str:
+    """`front_side` tells whether the answer side includes the question side,
+    files for scripts moved out of the template are added to `externalized`,
+    `cardtype_names` are all card types of the note type, which share the bundle"""
+
+    if setting.bundle and not setting.insert_stub:
+        bundle = get_bundle(
+            setting,
+            model_name,
+            model_id,
+            cardtype_names or [cardtype_name],
+            get_module_files(setting, model_name, model_id),
+        )
+        # files and scripts with field references keep their own element, placed
+        # before the bundle, so the libraries are defined when it runs
+        stringified_scripts = stringify_template_scripts(
+            setting,
+            model_name,
+            model_id,
+            cardtype_name,
+            fmt,
+            front_side,
+            externalized,
+            True,
+        )
+
+        if bundle:
+            stringified_scripts.append(
+                get_bundle_element(bundle[0], cardtype_name, fmt)
+            )
+    else:
+        stringified_scripts = stringify_template_scripts(
+            setting, model_name, model_id, cardtype_name, fmt, front_side, externalized
+        )
 
     code_string = (
         encapsulate_scripts(
             stringified_scripts,
             version,
             setting.indent_size,
+            answer_marker if fmt == "answer" else None,
         )
         if setting.enabled
         else ""
@@ -42,6 +124,46 @@ def stringify_for_template(
     return code_string
 
 
+def stringify_head_scripts(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_name: str,
+) -> List[Tuple[ScriptType, str]]:
+    """Each script is returned with its type, which decides the element it is loaded by"""
+    modules = get_module_files(setting, model_name, model_id)
+    head_scripts = stringify_assets(
+        setting,
+        model_name,
+        model_id,
+        cardtype_name,
+        "head",
+        modules,
+    )
+
+    if files := get_preloaded_files(
+        setting, model_name, model_id, cardtype_name, modules
+    ):
+        head_scripts.insert(0, ("js", get_preload_hints(files)))
+
+    return head_scripts
+
+
+def stringify_body_scripts(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_name: str,
+) -> List[Tuple[ScriptType, str]]:
+    return stringify_assets(
+        setting,
+        model_name,
+        model_id,
+        cardtype_name,
+        "body",
+    )
+
+
 def stringify_for_head(
     setting: ScriptSetting,
     model_name: str,
@@ -49,13 +171,15 @@ def stringify_for_head(
     cardtype_name: str,
 ) -> str:
     return "\n".join(
-        stringify_setting(
-            setting,
-            model_name,
-            model_id,
-            cardtype_name,
-            "head",
-        )
+        [
+            code
+            for _script_type, code in stringify_head_scripts(
+                setting,
+                model_name,
+                model_id,
+                cardtype_name,
+            )
+        ]
     )
 
 
@@ -66,13 +190,15 @@ def stringify_for_body(
     cardtype_name: str,
 ) -> str:
     return "\n".join(
-        stringify_setting(
-            setting,
-            model_name,
-            model_id,
-            cardtype_name,
-            "body",
-        )
+        [
+            code
+            for _script_type, code in stringify_body_scripts(
+                setting,
+                model_name,
+                model_id,
+                cardtype_name,
+            )
+        ]
     )
 
 
@@ -80,8 +206,12 @@ def stringify_for_external(
     setting: ScriptSetting,
     model_name: str,
     model_id: int,
+    cardtype_names: Optional[List[str]] = None,
 ) -> List[str]:
+    """`cardtype_names` are needed to write the bundle of the note type"""
     stringified_scripts = []
+    # modules import each other by name across label groups
+    modules = get_module_files(setting, model_name, model_id)
     groups = groupify_external(setting.scripts)
     for key, group in groups:
         inner_setting = replace(setting, scripts=list(group))
@@ -91,6 +221,7 @@ def stringify_for_external(
             model_id,
             None,
             "external",
+            modules=modules,
         )
 
         if len(inner) == 0:
@@ -102,11 +233,26 @@ def stringify_for_external(
             reducer = get_reducer(key)
             stringified_scripts.append(reducer.reducer(inner))
 
+    if (
+        setting.bundle
+        and setting.enabled
+        and not setting.insert_stub
+        and cardtype_names is not None
+        and (
+            bundle := get_bundle(
+                setting, model_name, model_id, cardtype_names, modules
+            )
+        )
+    ):
+        stringified_scripts.append(bundle)
+
     return stringified_scripts
 
 
 __all__ = [
     stringify_for_template,
+    stringify_head_scripts,
+    stringify_body_scripts,
     stringify_for_head,
     stringify_for_body,
     stringify_for_external,
@@ -0,0 +1,229 @@
+import json
+
+from hashlib import sha1
+from html import escape
+from typing import Optional, Tuple, List, Dict
+
+from ..config_types import ScriptSetting, Fmt
+
+from .package import package
+from .stringify import (
+    get_script_data,
+    is_bundled,
+    gen_data_attributes,
+    ModuleFiles,
+)
+from .script_data import (
+    stringify_script_data,
+    merge_sd,
+    isolate_code,
+    lazy_loader,
+    worker_shim,
+    session_loader,
+)
+from .groupify import groupify_script_data
+from .condition_parser import stringify_conds, group, tag_set_name
+from .indent import indent_lines
+from .prevent_reinclusion import answer_marker
+
+# marks the element loading the bundle, its value identifies the side of the card type
+bundle_attribute = "data-am-bundle"
+# set on the element once the bundle was run for it
+ran_attribute = "data-am-ran"
+# the functions of the bundles loaded into a webview, by the hash of their scripts
+bundle_registry = "amBundles"
+
+
+def get_context_key(cardtype_name: str, fmt: Fmt) -> str:
+    return f"{fmt}:{cardtype_name}"
+
+
+def to_bundled_sd(sd: dict) -> dict:
+    """The bundle runs the code of inline scripts, and the loaders of files"""
+    if "lazy" in sd and sd["lazy"]:
+        return package(sd["tag"], "js", "", lazy_loader(sd), sd["conditions"])
+
+    elif "worker" in sd:
+        return package(sd["tag"], "js", "", worker_shim(sd), sd["conditions"])
+
+    elif "session" in sd:
+        return package(sd["tag"], "js", "", session_loader(sd), sd["conditions"])
+
+    bundled = {**sd}
+
+    if "profile" in sd:
+        # the same script of several card types is bundled, and measured, once
+        bundled["profile"] = [sd["profile"][0], "", sd["profile"][2]]
+
+    if sd["type"] == "css":
+        # styles are attached next to the element loading the bundle
+        bundled["type"] = "js"
+        bundled["code"] = f"amStyle({json.dumps(sd['code'])})"
+
+    elif sd["type"] == "esm":
+        # inline modules cannot be run from a function, and run with every card
+        bundled["type"] = "js"
+        bundled["code"] = f"amModule({json.dumps(sd['code'])})"
+
+    return bundled
+
+
+def get_bundled_script_data(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_names: List[str],
+    modules: ModuleFiles,
+) -> List[Tuple[dict, List[Tuple[str, list]]]]:
+    """Scripts of all sides, each with the contexts and conditions it runs with"""
+    bundled: Dict[str, Tuple[dict, List[Tuple[str, list]]]] = {}
+
+    for cardtype_name in cardtype_names:
+        for fmt in ["question", "answer"]:
+            script_data = [
+                to_bundled_sd(sd)
+                for sd in get_script_data(
+                    setting, model_name, model_id, cardtype_name, fmt, modules
+                )
+                if is_bundled(sd)
+            ]
+
+            for (key, _execution), grp in groupify_script_data(script_data):
+                sds = list(grp) if len(key) == 0 else [merge_sd(key, list(grp))]
+
+                for sd in sds:
+                    # generated code can differ between card types
+                    identity = json.dumps(
+                        {k: v for k, v in sd.items() if k != "conditions"},
+                        sort_keys=True,
+                    )
+
+                    if identity not in bundled:
+                        bundled[identity] = (sd, [])
+
+                    bundled[identity][1].append(
+                        (get_context_key(cardtype_name, fmt), sd["conditions"])
+                    )
+
+    return list(bundled.values())
+
+
+def get_runtime_condition(contexts: List[Tuple[str, list]], context_count: int) -> str:
+    """Conditions resolved for each side are checked against the context of the card"""
+    keys_by_condition: Dict[str, List[str]] = {}
+
+    for key, conditions in contexts:
+        keys_by_condition.setdefault(stringify_conds(conditions), []).append(key)
+
+    clauses = []
+
+    for condition, keys in keys_by_condition.items():
+        if condition == "false":
+            continue
+
+        checks = (
+            []
+            if len(keys) == context_count
+            else [f"{json.dumps(keys)}.includes(amContext.key)"]
+        )
+
+        if condition != "true":
+            checks.append(group(condition))
+
+        clauses.append(" && ".join(checks) if len(checks) > 0 else "true")
+
+    if "true" in clauses:
+        return "true"
+
+    elif len(clauses) == 1:
+        return clauses[0]
+
+    return " || ".join([group(clause) for clause in clauses]) or "false"
+
+
+def get_bundle(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_names: List[str],
+    modules: ModuleFiles,
+) -> Optional[Tuple[str, str]]:
+    """Filename and code of the bundle of a note type"""
+    context_count = 2 * len(cardtype_names)
+    scripts = []
+
+    for sd, contexts in get_bundled_script_data(
+        setting, model_name, model_id, cardtype_names, modules
+    ):
+        condition = get_runtime_condition(contexts, context_count)
+
+        if condition == "false":
+            continue
+
+        code = isolate_code(
+            stringify_script_data({**sd, "conditions": []}, 0, False).rstrip("\n")
+        )
+
+        scripts.append(
+            code
+            if condition == "true"
+            else f"if ({condition}) {{\n{indent_lines(code, 4)}\n}}"
+        )
+
+    if len(scripts) == 0:
+        return None
+
+    body = "\n".join(scripts)
+    run_key = sha1(body.encode()).hexdigest()
+
+    # the scripts are compiled once per webview, later cards only call the function
+    bundle = package(
+        gen_data_attributes("Bundle", "v0.1"),
+        "js",
+        "",
+        f"""
+window.{bundle_registry} = window.{bundle_registry} || {{}}
+if (!{bundle_registry}['{run_key}']) {{
+    {bundle_registry}['{run_key}'] = (amContext) => {{
+        const {tag_set_name} = new Set(amContext.tags.split(' '))
+        const amStyle = (css) => {{
+            const style = document.createElement('style')
+            style.textContent = css
+            amContext.element.parentNode.appendChild(style)
+        }}
+        const amModule = (code) => {{
+            const script = document.createElement('script')
+            script.type = 'module'
+            script.textContent = code
+            amContext.element.parentNode.appendChild(script)
+        }}
+{indent_lines(body, 8)}
+    }}
+}}
+{{
+    // scripts evaluated by the reviewer itself are not the current script
+    const element = document.currentScript
+        || document.querySelector('script[{bundle_attribute}]:not([{ran_attribute}])')
+    element.setAttribute('{ran_attribute}', '')
+    const key = element.getAttribute('{bundle_attribute}')
+    // the answer side includes the question side via FrontSide
+    if (!key.startsWith('question:') || document.getElementsByClassName('{answer_marker}').length === 0) {{
+        {bundle_registry}['{run_key}']({{ key, tags: element.getAttribute('data-tags') || '', element }})
+    }}
+}}""".strip(),
+        [],
+    )
+
+    code = stringify_script_data(bundle, 0, False)
+
+    return (f"_am_{model_id}_{sha1(code.encode()).hexdigest()}.js", code)
+
+
+def get_bundle_element(filename: str, cardtype_name: str, fmt: Fmt) -> str:
+    """The only script of a template in bundle mode, its attributes are the context"""
+    key = escape(get_context_key(cardtype_name, fmt))
+
+    return (
+        f'<script {gen_data_attributes("Bundle", "v0.1")} {bundle_attribute}="{key}" '
+        f'data-tags="{{{{Tags}}}}" src="{filename}"></script>'
+    )
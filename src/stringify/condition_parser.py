@@ -1,6 +1,10 @@
 from functools import reduce
 
 
+tag_set_name = "amTags"
+guard_name = "amGuard"
+
+
 def get_condition_parser(card, position):
     is_true = lambda v: isinstance(v, bool) and v == True
     is_false = lambda v: isinstance(v, bool) and v == False
@@ -150,31 +154,37 @@ def get_condition_parser(card, position):
     return parse_condition
 
 
-def stringify_conds(conds) -> str:
-    if len(conds) == 0:
-        return "true"
+def group(stringified_cond: str) -> str:
+    return (
+        f"({stringified_cond})"
+        if "&&" in stringified_cond or "||" in stringified_cond
+        else stringified_cond
+    )
+
 
-    elif isinstance(conds, bool) and conds:
+def stringify_conds(conds) -> str:
+    if isinstance(conds, bool) and conds:
         return "true"
 
     elif isinstance(conds, bool) and not conds:
         return "false"
 
+    elif len(conds) == 0:
+        return "true"
+
     elif conds[0] == "&":
-        stringified_conds = [stringify_conds(c) for c in conds[1:]]
-        parsed_result = [res[1] for res in stringified_conds]
+        parsed_result = [stringify_conds(c) for c in conds[1:]]
         if "false" in parsed_result:
             return "false"
         else:
-            return " && ".join([p for p in parsed_result if p != "true"])
+            return " && ".join([group(p) for p in parsed_result if p != "true"])
 
     elif conds[0] == "|":
-        stringified_conds = [stringify_conds(c) for c in conds[1:]]
-        parsed_result = [res[1] for res in stringified_conds]
+        parsed_result = [stringify_conds(c) for c in conds[1:]]
         if "true" in parsed_result:
             return "true"
         else:
-            return " || ".join([p for p in parsed_result if p != "false"])
+            return " || ".join([group(p) for p in parsed_result if p != "false"])
 
     elif conds[0] == "!":
         stringed_cond = stringify_conds(conds[1])
@@ -218,18 +228,58 @@ def stringify_conds(conds) -> str:
         elif conds[1] == "endsWith":
             return f"'{{{{Tags}}}}'.endsWith('{conds[2]}')"
 
+    # set by the prevent reinclusion script
+    elif conds[0] == "guard":
+        return f"!{guard_name}['{conds[1]}']"
+
+    # the tag set is created once per card by the tag prelude
     elif conds[0] == "tag":
         if conds[1] == "=":
-            return f"'{{{{Tags}}}}'.split(' ').includes('{conds[2]}')"
+            return f"{tag_set_name}.has('{conds[2]}')"
 
         elif conds[1] == "!=":
-            return f"'!{{{{Tags}}}}'.split(' ').includes('{conds[2]}')"
+            return f"!{tag_set_name}.has('{conds[2]}')"
 
         elif conds[1] == "includes":
-            return f"'{{{{Tags}}}}'.split(' ').some(v => v.includes('{conds[2]}'))"
+            return f"[...{tag_set_name}].some(v => v.includes('{conds[2]}'))"
 
         elif conds[1] == "startsWith":
-            return f"'{{{{Tags}}}}'.split(' ').some(v => v.startsWith('{conds[2]}'))"
+            return f"[...{tag_set_name}].some(v => v.startsWith('{conds[2]}'))"
 
         elif conds[1] == "endsWith":
-            return f"'{{{{Tags}}}}'.split(' ').some(v => v.endsWith('{conds[2]}'))"
+            return f"[...{tag_set_name}].some(v => v.endsWith('{conds[2]}'))"
+
+
+def add_guard(conds, guard_key: str) -> list:
+    guard = ["guard", guard_key]
+
+    return guard if isinstance(conds, bool) or len(conds) == 0 else ["&", guard, conds]
+
+
+def split_guard(conds) -> tuple:
+    """Separates the guard added by `add_guard` from the conditions of the script"""
+    if isinstance(conds, bool) or len(conds) == 0:
+        return ([], conds)
+
+    elif conds[0] == "guard":
+        return (conds, [])
+
+    elif (
+        conds[0] == "&"
+        and len(conds) == 3
+        and isinstance(conds[1], list)
+        and conds[1][0] == "guard"
+    ):
+        return (conds[1], conds[2])
+
+    return ([], conds)
+
+
+def uses_tag_set(conds) -> bool:
+    if isinstance(conds, bool) or len(conds) == 0:
+        return False
+
+    elif conds[0] in ["&", "|", "!"]:
+        return any([uses_tag_set(c) for c in conds[1:]])
+
+    return conds[0] == "tag"
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 from itertools import groupby
 
 from ..config_types import Script, ConcreteScript, MetaScript
@@ -26,8 +26,16 @@ def groupify_external(scripts):
     return grouped
 
 
+def get_script_data_group(sd: object) -> Tuple[str, str]:
+    """Scripts of a label are only merged if they are run the same way,
+    unlabelled scripts stay in their order"""
+    label = get_script_data_label(sd)
+
+    return (label, sd["execution"] if len(label) > 0 else "")
+
+
 def groupify_script_data(script_data: List[object]):
-    sorted_scripts = sorted(script_data, key=get_script_data_label)
-    grouped = groupby(sorted_scripts, key=get_script_data_label)
+    sorted_scripts = sorted(script_data, key=get_script_data_group)
+    grouped = groupby(sorted_scripts, key=get_script_data_group)
 
     return grouped
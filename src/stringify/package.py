@@ -1,21 +1,85 @@
-def package(tag: str, subtype: str, label: str, code: str, conditions: list) -> object:
+from hashlib import sha1
+
+from ..config_types import ExecutionMode
+
+
+def package(
+    tag: str,
+    subtype: str,
+    label: str,
+    code: str,
+    conditions: list,
+    execution: ExecutionMode = "immediate",
+) -> object:
     return {
         "tag": tag,
         "type": subtype,
         "label": label,
         "code": code,
         "conditions": conditions,
+        "execution": execution,
     }
 
 
 # filename is required for both insertion into template and creation of file
+def package_for_session(
+    tag: str,
+    subtype: str,
+    filename: str,
+    code: str,
+    conditions: list,
+    execution: ExecutionMode = "immediate",
+    lazy: str = "",
+) -> object:
+    return {
+        "tag": tag,
+        "type": subtype,
+        "src": filename,
+        # identifies the script in the registry of loaded scripts
+        "session": sha1(code.encode()).hexdigest(),
+        "code": code,
+        "conditions": conditions,
+        "execution": execution,
+        "lazy": lazy,
+    }
+
+
 def package_for_external(
-    tag: str, subtype: str, filename: str, code: str, conditions: list
+    tag: str,
+    subtype: str,
+    filename: str,
+    code: str,
+    conditions: list,
+    execution: ExecutionMode = "immediate",
+    lazy: str = "",
+) -> object:
+    return {
+        "tag": tag,
+        "type": subtype,
+        "src": filename,
+        "code": code,
+        "conditions": conditions,
+        "execution": execution,
+        "lazy": lazy,
+    }
+
+
+def package_for_worker(
+    tag: str,
+    subtype: str,
+    filename: str,
+    code: str,
+    conditions: list,
+    name: str,
 ) -> object:
     return {
         "tag": tag,
         "type": subtype,
         "src": filename,
+        # workers are addressed by name from the page
+        "worker": name,
+        "hash": sha1(code.encode()).hexdigest(),
         "code": code,
         "conditions": conditions,
+        "execution": "immediate",
     }
@@ -0,0 +1,38 @@
+import json
+
+from typing import List, Tuple
+
+from ..config_types import ScriptType
+
+from .package import package
+from .stringify import gen_data_attributes
+from .script_data import stringify_script_data
+
+
+def get_preload_hints(files: List[Tuple[str, ScriptType]]) -> str:
+    """Lets the webview fetch the files while the card is still being parsed"""
+    hints = json.dumps(
+        [
+            [filename, "modulepreload" if script_type == "esm" else "preload"]
+            for filename, script_type in files
+        ]
+    )
+
+    preload_hints = package(
+        gen_data_attributes("Preload hints", "v0.1"),
+        "js",
+        "",
+        f"""
+for (const [href, rel] of {hints}) {{
+    if (!document.head.querySelector(`link[href="${{href}}"]`)) {{
+        const link = document.createElement('link')
+        link.rel = rel
+        link.as = 'script'
+        link.href = href
+        document.head.appendChild(link)
+    }}
+}}""".strip(),
+        [],
+    )
+
+    return stringify_script_data(preload_hints, 0, False)
@@ -1,21 +1,35 @@
+from hashlib import sha1
+
+from ..config_types import ScriptSetting
+from ..utils import version
+
 from .package import package
 from .stringify import gen_data_attributes
 from .script_data import stringify_script_data
+from .condition_parser import guard_name
+
+# class of the block inserted on the answer side
+answer_marker = "anki-am-answer"
+
+
+def get_guard_key(setting: ScriptSetting) -> str:
+    """Identifies the question side block of a setting"""
+
+    return f"{version}:{sha1(repr(setting.scripts).encode()).hexdigest()[:12]}"
+
+
+def get_prevent_reinclusion(indent_size: int, guard_key: str) -> str:
+    # The answer side includes the question side via {{FrontSide}}.
+    # Instead of removing the earlier blocks from the DOM, the question side
+    # scripts check this flag, which is only set if the answer block follows.
+    prevent_reinclusion = package(
+        gen_data_attributes("Prevent reinclusion", "v0.2"),
+        "js",
+        "",
+        f"""
+window.{guard_name} = window.{guard_name} || {{}}
+{guard_name}['{guard_key}'] = document.getElementsByClassName('{answer_marker}').length > 0""".strip(),
+        [],
+    )
 
-prevent_reinclusion = package(
-    gen_data_attributes("Prevent reinclusion", "v0.1"),
-    "js",
-    "",
-    """
-    var ankiAms = document.querySelectorAll('#anki-am')
-  if (ankiAms.length > 1) {
-    for (const am of Array.from(ankiAms).slice(0, -1)) {
-      am.outerHTML = ''
-  }
-}""".strip(),
-    [],
-)
-
-
-def get_prevent_reinclusion(indent_size):
     return stringify_script_data(prevent_reinclusion, indent_size, True)
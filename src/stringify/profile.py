@@ -0,0 +1,50 @@
+from .package import package
+from .stringify import gen_data_attributes
+from .script_data import stringify_script_data
+
+# prefix of the messages sent back via `pycmd`
+profile_cmd = "amProfile"
+# milliseconds between two flushes
+flush_interval = 2000
+
+# defined once per webview, the entries are flushed and emptied periodically
+profile_prelude = package(
+    gen_data_attributes("Profiler", "v0.1"),
+    "js",
+    "",
+    f"""
+if (!window.amRecord) {{
+    const amEntries = {{}}
+    const amStarts = {{}}
+    const amEntry = (id) =>
+        (amEntries[id] = amEntries[id] || {{ loads: 0, runs: 0, total: 0, max: 0 }})
+    window.amRecord = {{
+        load: (id) => {{
+            amEntry(id).loads += 1
+        }},
+        enter: (id) => {{
+            amEntry(id).runs += 1
+            amStarts[id] = performance.now()
+        }},
+        leave: (id) => {{
+            const entry = amEntry(id)
+            const duration = performance.now() - amStarts[id]
+            entry.total += duration
+            entry.max = Math.max(entry.max, duration)
+        }},
+    }}
+    setInterval(() => {{
+        const ids = Object.keys(amEntries)
+        if (ids.length > 0) {{
+            pycmd(`{profile_cmd}:${{JSON.stringify(amEntries)}}`)
+            ids.forEach((id) => delete amEntries[id])
+        }}
+    }}, {flush_interval})
+}}""".strip(),
+    [],
+)
+
+
+def get_profile_prelude(indent_size: int, in_html: bool) -> str:
+    return stringify_script_data(profile_prelude, indent_size, in_html)
+
@@ -1,13 +1,43 @@
+import json
+
 from typing import Union, Tuple
 
 from ..lib.registrar import get_reducer
 from ..config_types import ScriptInsertion
 
-from .condition_parser import stringify_conds
+from .condition_parser import stringify_conds, split_guard
 from .indent import indent_lines
 from .package import package
 
 
+def schedule_code(code: str, execution: str) -> str:
+    """Deferred scripts run after the card is painted, in the order they were emitted"""
+    if execution not in ["defer", "idle"]:
+        return code
+
+    scheduler = (
+        "setTimeout"
+        if execution == "defer"
+        else "(window.requestIdleCallback || setTimeout)"
+    )
+    main_code = "\n".join([f"    {line}" for line in code.split("\n")])
+
+    return f"{scheduler}(() => {{\n{main_code}\n}})"
+
+
+def profile_hook(profile_id: str, event: str) -> str:
+    """Does nothing unless the profiler was added to the webview, so the hooks
+    can stay in the stored templates"""
+    return f"window.amRecord && amRecord.{event}({profile_id})"
+
+
+def profile_code(code: str, profile_id: str) -> str:
+    """Placed inside the conditions, so skipped scripts are only counted as loaded"""
+    return "\n".join(
+        [profile_hook(profile_id, "enter"), code, profile_hook(profile_id, "leave")]
+    )
+
+
 def wrap_code(code: str, conditions: Union[bool, list]):
     if ((type(conditions) is bool) and conditions) or len(conditions) == 0:
         return code
@@ -17,7 +47,137 @@ def wrap_code(code: str, conditions: Union[bool, list]):
         return f"if ({stringify_conds(conditions)}) {{\n{main_code}\n}}"
 
 
+def isolate_code(code: str) -> str:
+    """Keeps coalesced scripts from sharing variables and errors"""
+    main_code = "\n".join([f"        {line}" for line in code.split("\n")])
+
+    return f"""try {{
+    (function () {{
+{main_code}
+    }})()
+}} catch (error) {{
+    console.error(error)
+}}"""
+
+
+def can_coalesce(sd: object) -> bool:
+    return sd["type"] == "js" and "src" not in sd
+
+
+def session_loader(sd: object) -> str:
+    """Loads the file once per webview, later cards find it in the registry"""
+    module = '\n    script.type = "module"' if sd["type"] == "esm" else ""
+
+    return f"""window.amSession = window.amSession || new Set()
+if (!amSession.has('{sd["session"]}')) {{
+    amSession.add('{sd["session"]}')
+    const script = document.createElement('script'){module}
+    script.src = '{sd["src"]}'
+    document.head.appendChild(script)
+}}"""
+
+
+# dispatched on the document for every message posted by a worker
+worker_event = "amworker"
+
+
+def worker_shim(sd: object) -> str:
+    """Starts the worker once per webview, and hands it the content of each card"""
+    name = json.dumps(sd["worker"])
+    options = ", { type: 'module' }" if sd["type"] == "esm" else ""
+
+    return f"""window.amWorkers = window.amWorkers || {{}}
+if (!amWorkers[{name}] || amWorkers[{name}].hash !== '{sd["hash"]}') {{
+    if (amWorkers[{name}]) {{
+        amWorkers[{name}].terminate()
+    }}
+    const worker = new Worker('{sd["src"]}'{options})
+    worker.hash = '{sd["hash"]}'
+    worker.onmessage = (event) => document.dispatchEvent(
+        new CustomEvent('{worker_event}', {{ detail: {{ name: {name}, data: event.data }} }})
+    )
+    amWorkers[{name}] = worker
+}}
+amWorkers[{name}].postMessage({{
+    html: (document.getElementById('qa') || document.body).innerHTML,
+}})"""
+
+
+def file_loader(sd: object) -> str:
+    if "session" in sd:
+        return session_loader(sd)
+
+    elif sd["type"] == "esm":
+        return f"import('./{sd['src']}')"
+
+    return f"""const script = document.createElement('script')
+script.src = '{sd["src"]}'
+document.head.appendChild(script)"""
+
+
+# first interactions which load a lazy script
+lazy_events = ["pointerdown", "keydown"]
+
+
+def lazy_loader(sd: object) -> str:
+    """Only loads the file when the card needs it"""
+    loader = "\n".join([f"    {line}" for line in file_loader(sd).split("\n")])
+
+    if sd["lazy"] != "interaction":
+        return f"if (document.querySelector({json.dumps(sd['lazy'])})) {{\n{loader}\n}}"
+
+    loader = "\n".join([f"    {line}" for line in loader.split("\n")])
+    add_listeners = "\n".join(
+        [f"    document.addEventListener('{event}', load, true)" for event in lazy_events]
+    )
+    remove_listeners = "\n".join(
+        [
+            f"        document.removeEventListener('{event}', load, true)"
+            for event in lazy_events
+        ]
+    )
+
+    # The listener is only registered once, even if several cards are shown before.
+    # Like other external scripts, the file runs again for each card interacted
+    # with, so the entry is removed together with the listeners when it loads.
+    return f"""window.amLazy = window.amLazy || {{}}
+if (!amLazy['{sd["src"]}']) {{
+    const load = () => {{
+{remove_listeners}
+        delete amLazy['{sd["src"]}']
+{loader}
+    }}
+    amLazy['{sd["src"]}'] = load
+{add_listeners}
+}}"""
+
+
 def stringify_script_data(sd: object, indent_size: int, in_html: bool) -> str:
+    if "lazy" in sd and sd["lazy"] and in_html:
+        return stringify_script_data(
+            package(sd["tag"], "js", "", lazy_loader(sd), sd["conditions"]),
+            indent_size,
+            in_html,
+        )
+
+    if "worker" in sd:
+        if in_html:
+            return stringify_script_data(
+                package(sd["tag"], "js", "", worker_shim(sd), sd["conditions"]),
+                indent_size,
+                in_html,
+            )
+
+        # conditions refer to the document, which the worker cannot see
+        sd = {**sd, "conditions": []}
+
+    if "session" in sd and in_html:
+        return stringify_script_data(
+            package(sd["tag"], "js", "", session_loader(sd), sd["conditions"]),
+            indent_size,
+            in_html,
+        )
+
     srcTag = f" src=\"{sd['src']}\"" if "src" in sd else ""
     module = ' type="module"' if sd["type"] == "esm" else ""
 
@@ -28,14 +188,36 @@ def stringify_script_data(sd: object, indent_size: int, in_html: bool) -> str:
         )
         if in_html
         else (
-            f'// {sd["tag"]}',
+            f'/* {sd["tag"]} */' if sd["type"] == "css" else f'// {sd["tag"]}',
             "",
         )
     )
 
+    profile_id = json.dumps(json.dumps(sd["profile"])) if "profile" in sd else None
+    profiled_code = (
+        profile_code(sd["code"], profile_id) if profile_id else sd["code"]
+    )
+
+    # modules cannot be wrapped, as imports must stay at the top level
+    scheduled_code = (
+        schedule_code(profiled_code, sd["execution"])
+        if sd["type"] == "js"
+        else profiled_code
+    )
+    # question side scripts skipped by the guard are not loaded on the answer side
+    guard, conditions = (
+        split_guard(sd["conditions"]) if profile_id else ([], sd["conditions"])
+    )
     wrapped_code = (
-        "" if "src" in sd and in_html else wrap_code(sd["code"], sd["conditions"])
+        "" if "src" in sd and in_html else wrap_code(scheduled_code, conditions)
     )
+
+    if profile_id and len(wrapped_code) > 0:
+        # scripts which are loaded, but never run, are reported as well
+        wrapped_code = wrap_code(
+            f"{profile_hook(profile_id, 'load')}\n{wrapped_code}", guard
+        )
+
     indented_code = indent_lines(wrapped_code, indent_size if in_html else 0)
 
     # avoid two empty new lines for external scripts
@@ -66,10 +248,17 @@ def merge_sd(key: str, sds: list):
     reducer = get_reducer(key)
     compiled = reducer.reducer([sd["code"] for sd in sds])
 
-    return package(
+    merged = package(
         base["tag"],
         base["type"],
         key,
         compiled,
         base["conditions"],
+        base["execution"],
     )
+
+    if "profile" in base:
+        # merged scripts are measured together under their label
+        merged["profile"] = [*base["profile"][:2], key]
+
+    return merged
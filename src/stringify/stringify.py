@@ -1,25 +1,48 @@
+import re
+import json
+
 from hashlib import sha1
-from typing import Optional, Union, Literal, Tuple
+from typing import Optional, Union, Literal, Tuple, List, Dict, Set, NamedTuple
 
 from ..config_types import (
     ScriptSetting,
     ConcreteScript,
     ScriptInsertion,
     ScriptPosition,
+    ScriptType,
+    Position,
     Fmt,
 )
 from ..lib.registrar import get_interface
 from ..utils import version
+from ..timings import timed
 
-from .condition_parser import get_condition_parser
+from .condition_parser import (
+    get_condition_parser,
+    uses_tag_set,
+    add_guard,
+    tag_set_name,
+)
 from .groupify import groupify_script_data
 from .indent import indent_lines
-from .script_data import stringify_sd, merge_sd
-from .package import package, package_for_external
+from .script_data import (
+    stringify_sd,
+    stringify_script_data,
+    merge_sd,
+    can_coalesce,
+    isolate_code,
+)
+from .package import (
+    package,
+    package_for_external,
+    package_for_session,
+    package_for_worker,
+)
 
 
-def encapsulate_scripts(scripts, version, indent_size) -> str:
-    pretext = '<div id="anki-am" data-name="Assets by ASSET MANAGER"'
+def encapsulate_scripts(scripts, version, indent_size, marker=None) -> str:
+    class_text = f' class="{marker}"' if marker else ""
+    pretext = f'<div id="anki-am"{class_text} data-name="Assets by ASSET MANAGER"'
     version_text = f' data-version="{version}"' if len(version) > 0 else ""
 
     top_delim = f"{pretext}{version_text}>"
@@ -39,41 +62,187 @@ def gen_data_attributes(name: str, version: str):
     return f'data-name="{name}" data-version="{version}"'
 
 
+# `var`, so it can be redeclared when the next card is shown.
+# Head and body are not rendered by Anki, so no tags match there, as before
+tag_prelude = package(
+    gen_data_attributes("Tag set", "v0.1"),
+    "js",
+    "",
+    f"var {tag_set_name} = new Set('{{{{Tags}}}}'.split(' '))",
+    [],
+)
+
+# Removes the question side block on the answer side, before the guard this
+# was done for all blocks. Only used if a script of the block cannot be guarded.
+reinclusion_sweep = package(
+    gen_data_attributes("Prevent reinclusion", "v0.1"),
+    "js",
+    "",
+    """
+var ankiAms = document.querySelectorAll('#anki-am')
+if (ankiAms.length > 1) {
+    for (const am of Array.from(ankiAms).slice(0, -1)) {
+        am.outerHTML = ''
+    }
+}""".strip(),
+    [],
+)
+
+
+def can_guard(sd: object) -> bool:
+    """Inline scripts and the loaders of files can be wrapped in the guard,
+    files and modules which are run by the webview itself cannot"""
+    return (
+        (sd["type"] == "js" and "src" not in sd)
+        or ("lazy" in sd and bool(sd["lazy"]))
+        or "session" in sd
+        or "worker" in sd
+    )
+
+
+def needs_sweep(script_data: list) -> bool:
+    return any(sd["type"] != "css" and not can_guard(sd) for sd in script_data)
+
+
+# positions of scripts which are written to the media folder
+file_positions = ["external", "session", "worker"]
+
+
+def is_bundled(sd: dict) -> bool:
+    """Scripts run by the bundle, all others keep their own element in the template"""
+    if "src" in sd:
+        # the bundle only runs the loaders, files are loaded as globals by their element
+        return bool(sd.get("lazy")) or "worker" in sd or "session" in sd
+
+    # field references are only filled in by Anki within the template
+    return "{{" not in sd["code"]
+
+
+def get_script_filename(model_id: int, script_name: str) -> str:
+    return f"_am_{model_id}_{sha1(script_name.encode()).hexdigest()}.js"
+
+
 # skip this script
 def position_does_not_match(script, position: str) -> bool:
-    return script.position != position and not (
-        script.position in ["into_template", "external"]
-        and position in ["question", "answer"]
+    return (
+        script.position != position
+        and not (
+            script.position in ["into_template", *file_positions]
+            and position in ["question", "answer"]
+        )
+        and not (script.position in file_positions and position == "external")
     )
 
 
 def get_script(
     script, model_name, cardtype_name, position
 ) -> ConcreteScript:
-    return script if isinstance(script, ConcreteScript) else get_interface(script.tag).getter(
-        script.id,
-        script.storage,
-    )
+    if isinstance(script, ConcreteScript):
+        return script
+
+    with timed(f"getter:{script.tag}", model_name, cardtype_name):
+        return get_interface(script.tag).getter(
+            script.id,
+            script.storage,
+        )
+
 
 def get_code(
     script, model_name, cardtype_name, position
 ) -> str:
-    return script.code if isinstance(script, ConcreteScript) else get_interface(script.tag).generator(
-        script.id,
-        script.storage,
-        model_name,
-        cardtype_name,
-        position,
-    )
+    if isinstance(script, ConcreteScript):
+        return script.code
 
+    with timed(f"generator:{script.tag}", model_name, cardtype_name):
+        return get_interface(script.tag).generator(
+            script.id,
+            script.storage,
+            model_name,
+            cardtype_name,
+            position,
+        )
 
-def stringify_setting(
+
+# `import ... from "am:Other Script"` refers to a shared module of the setting
+module_specifier_regex = re.compile(r"""(\bfrom\s*|\bimport\s*\(?\s*)(["'])am:(.+?)\2""")
+
+# filename and code of each shared module by script name
+ModuleFiles = Dict[str, Tuple[str, str]]
+
+
+def is_shared_module(script: ConcreteScript) -> bool:
+    """ES modules as external documents are evaluated once per webview,
+    modules in the template or head/body run with every card"""
+    return script.type == "esm" and script.position == "external" and not script.lazy
+
+
+def resolve_module_imports(code: str, modules: ModuleFiles) -> str:
+    def replace_specifier(match) -> str:
+        if match.group(3) not in modules:
+            return match.group(0)
+
+        filename = modules[match.group(3)][0]
+        return f"{match.group(1)}{match.group(2)}./{filename}{match.group(2)}"
+
+    return re.sub(module_specifier_regex, replace_specifier, code)
+
+
+def get_module_files(
+    setting: ScriptSetting, model_name: str, model_id: int
+) -> ModuleFiles:
+    """Filename and code of each shared module, with imports by name resolved.
+    Is computed once per stringified setting, as it calls the generators"""
+
+    sources = {}
+
+    if not setting.enabled or setting.insert_stub:
+        return {}
+
+    for scr in setting.scripts:
+        # modules are shared by all card types, so they are generated like external scripts
+        script = get_script(scr, model_name, None, "external")
+
+        if script.enabled and is_shared_module(script) and script.name not in sources:
+            sources[script.name] = get_code(scr, model_name, None, "external")
+
+    files = {}
+
+    def resolve(name: str, pending: Set[str]) -> Optional[str]:
+        if name in files:
+            return files[name][0]
+
+        elif name in pending or name not in sources:
+            # import cycles cannot be content-addressed
+            return None
+
+        def replace_specifier(match) -> str:
+            filename = resolve(match.group(3), pending | {name})
+
+            return (
+                f"{match.group(1)}{match.group(2)}./{filename}{match.group(2)}"
+                if filename
+                else match.group(0)
+            )
+
+        code = re.sub(module_specifier_regex, replace_specifier, sources[name])
+        files[name] = (f"_am_{model_id}_{sha1(code.encode()).hexdigest()}.js", code)
+
+        return files[name][0]
+
+    for name in sources:
+        resolve(name, set())
+
+    return files
+
+
+def get_script_data(
     setting: ScriptSetting,
     model_name: str,
     model_id: int,
     cardtype_name: str,
     position: ScriptInsertion,
-) -> str:
+    modules: ModuleFiles,
+) -> list:
     the_parser = get_condition_parser(cardtype_name, position)
     script_data = []
 
@@ -88,15 +257,18 @@ def stringify_setting(
             position,
         )
 
+        # the files of modules are written regardless of the card type
+        writes_module = position == "external" and is_shared_module(script)
+
         if (
             not script.enabled
-                or position_does_not_match(script, position)
+                or (position_does_not_match(script, position) and not writes_module)
         ):
             continue
 
         needs_inject, conditions_simplified = the_parser(script.conditions)
 
-        if not needs_inject:
+        if not needs_inject and not writes_module:
             continue
 
         tag = gen_data_attributes(
@@ -104,6 +276,25 @@ def stringify_setting(
             script.version,
         )
 
+        if is_shared_module(script) and script.name in modules:
+            filename, module_code = modules[script.name]
+
+            script_data.append(
+                package_for_external(tag, "esm", filename, module_code, [])
+                if writes_module
+                # the module map of the webview only evaluates it once
+                else package(
+                    tag,
+                    "js",
+                    script.label,
+                    f"import('./{filename}')",
+                    conditions_simplified,
+                    script.execution,
+                )
+            )
+
+            continue
+
         code = get_code(
             scr,
             model_name,
@@ -111,30 +302,398 @@ def stringify_setting(
             position,
         )
 
-        if script.position == "external":
-            filename = f"_am_{model_id}_{sha1(script.name.encode()).hexdigest()}.js"
+        if script.type == "esm":
+            code = resolve_module_imports(code, modules)
+
+        if script.position == "worker":
+            filename = get_script_filename(model_id, script.name)
+
             script_data.append(
-                package_for_external(
-                    tag, script.type, filename, code, conditions_simplified
+                package_for_worker(
+                    tag,
+                    script.type,
+                    filename,
+                    code,
+                    conditions_simplified,
+                    script.name,
+                )
+            )
+        elif script.position in file_positions:
+            filename = get_script_filename(model_id, script.name)
+            to_package = (
+                package_for_session
+                if script.position == "session"
+                else package_for_external
+            )
+
+            script_data.append(
+                to_package(
+                    tag,
+                    script.type,
+                    filename,
+                    code,
+                    conditions_simplified,
+                    script.execution,
+                    script.lazy,
                 )
             )
         else:
             script_data.append(
-                package(tag, script.type, script.label, code, conditions_simplified)
+                package(
+                    tag,
+                    script.type,
+                    script.label,
+                    code,
+                    conditions_simplified,
+                    script.execution,
+                )
             )
 
-    stringified = []
-    groups = groupify_script_data(script_data)
-    in_html = position in ["question", "answer"]
+        if script.type == "js" and script.position != "worker":
+            # the hooks only record where the profiler was added to the webview
+            script_data[-1]["profile"] = [model_name, cardtype_name, script.name]
+
+    return script_data
+
+
+def get_shared_script_data(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_name: str,
+    modules: ModuleFiles,
+) -> list:
+    """Scripts which are the same on both sides of the card type"""
+
+    question_data = get_script_data(
+        setting, model_name, model_id, cardtype_name, "question", modules
+    )
+    answer_data = get_script_data(
+        setting, model_name, model_id, cardtype_name, "answer", modules
+    )
+
+    if needs_sweep(question_data):
+        # the sweep removes the question side copies
+        return []
+
+    # labelled scripts are merged with the rest of their group
+    return [
+        sd
+        for sd in answer_data
+        if sd in question_data and ("label" not in sd or len(sd["label"]) == 0)
+    ]
+
+
+class ExternalizedScript(NamedTuple):
+    filename: str
+    code: str
+    # size of the template minus the size with the script inline
+    saved: int
+
+
+def externalize_script_data(
+    script_data: list,
+    threshold: int,
+    model_id: int,
+    indent_size: int,
+    externalized: Optional[List[ExternalizedScript]],
+) -> list:
+    """Large inline scripts are replaced by a reference to a file with the same code"""
+    result = []
+
+    for sd in script_data:
+        if "src" in sd or sd["type"] != "js":
+            result.append(sd)
+            continue
+
+        inline_size = len(stringify_sd(sd, indent_size, True).encode())
 
-    for key, group in groups:
+        if inline_size <= threshold:
+            result.append(sd)
+            continue
+
+        # conditions are moved into the file as well
+        code = stringify_script_data(sd, 0, False)
+
+        if "{{" in code:
+            # field references are only filled in by Anki within the template
+            result.append(sd)
+            continue
+
+        filename = f"_am_{model_id}_{sha1(code.encode()).hexdigest()}.js"
+        external_sd = {**sd, "src": filename}
+
+        if externalized is not None:
+            saved = inline_size - len(stringify_sd(external_sd, indent_size, True).encode())
+            externalized.append(ExternalizedScript(filename, code, saved))
+
+        result.append(external_sd)
+
+    return result
+
+
+def coalesce_inline(inline: list) -> object:
+    return package(
+        gen_data_attributes("Coalesced scripts", "v0.1"),
+        "js",
+        "",
+        "\n".join(
+            [
+                isolate_code(stringify_script_data(sd, 0, False).rstrip("\n"))
+                for sd in inline
+            ]
+        ),
+        [],
+    )
+
+
+def coalesce_script_data(script_data: list) -> list:
+    """Adjacent inline scripts are merged, so the order of all scripts is kept"""
+    result = []
+    run = []
+
+    for sd in [*script_data, None]:
+        if sd is not None and can_coalesce(sd):
+            run.append(sd)
+            continue
+
+        if len(run) > 1:
+            result.append(coalesce_inline(run))
+        else:
+            result.extend(run)
+
+        run = []
+
+        if sd is not None:
+            result.append(sd)
+
+    return result
+
+
+def get_grouped_script_data(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_name: str,
+    position: ScriptInsertion,
+    guard_key: Optional[str],
+    shared: list,
+    externalized: Optional[List[ExternalizedScript]],
+    modules: ModuleFiles,
+    bundled: bool,
+) -> list:
+    script_data = get_script_data(
+        setting,
+        model_name,
+        model_id,
+        cardtype_name,
+        position,
+        modules,
+    )
+
+    if bundled:
+        # the others are run by the bundle of the note type
+        script_data = [sd for sd in script_data if not is_bundled(sd)]
+
+    if position == "answer":
+        # the question side copies are run via {{FrontSide}}
+        script_data = [sd for sd in script_data if sd not in shared]
+
+    # files of external scripts use the tag set of the template loading them
+    uses_tags = position != "external" and any(
+        uses_tag_set(sd["conditions"]) for sd in script_data
+    )
+
+    sweep = guard_key is not None and needs_sweep(script_data)
+
+    if guard_key:
+        script_data = [
+            {**sd, "conditions": add_guard(sd["conditions"], guard_key)}
+            if can_guard(sd) and sd not in shared
+            else sd
+            for sd in script_data
+        ]
+
+    grouped_data = []
+
+    for (key, _execution), group in groupify_script_data(script_data):
         if len(key) == 0:
-            stringified.extend(
-                [stringify_sd(sd, setting.indent_size, in_html) for sd in group]
-            )
+            grouped_data.extend(group)
         else:
-            stringified.append(
-                stringify_sd(merge_sd(key, list(group)), setting.indent_size, in_html)
+            grouped_data.append(merge_sd(key, list(group)))
+
+    if setting.coalesce and position != "external":
+        grouped_data = coalesce_script_data(grouped_data)
+
+    in_html = position in ["question", "answer"]
+
+    if in_html and setting.externalize_threshold > 0:
+        grouped_data = externalize_script_data(
+            grouped_data,
+            setting.externalize_threshold,
+            model_id,
+            setting.indent_size,
+            externalized,
+        )
+
+    if uses_tags:
+        # is never coalesced or externalized, so `amTags` stays a global
+        grouped_data.insert(0, tag_prelude)
+
+    if sweep:
+        grouped_data.insert(0, reinclusion_sweep)
+
+    return grouped_data
+
+
+def has_conditions(conditions: Union[bool, list]) -> bool:
+    return not isinstance(conditions, bool) and len(conditions) > 0
+
+
+def style_loader(css: str) -> str:
+    return f"""const style = document.createElement('style')
+style.textContent = {json.dumps(css)}
+document.head.appendChild(style)"""
+
+
+def to_asset_script_data(sd: object) -> object:
+    """Styles which depend on the card are added by a script instead"""
+    if sd["type"] == "css" and has_conditions(sd["conditions"]):
+        return {**sd, "type": "js", "code": style_loader(sd["code"])}
+
+    return sd
+
+
+def _stringify_setting(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_name: str,
+    position: ScriptInsertion,
+    guard_key: Optional[str],
+    shared: list,
+    externalized: Optional[List[ExternalizedScript]],
+    modules: ModuleFiles,
+    bundled: bool,
+) -> List[str]:
+    grouped_data = get_grouped_script_data(
+        setting,
+        model_name,
+        model_id,
+        cardtype_name,
+        position,
+        guard_key,
+        shared,
+        externalized,
+        modules,
+        bundled,
+    )
+    in_html = position in ["question", "answer"]
+
+    return [stringify_sd(sd, setting.indent_size, in_html) for sd in grouped_data]
+
+
+def get_preloaded_files(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_name: str,
+    modules: ModuleFiles,
+) -> List[Tuple[str, ScriptType]]:
+    """Files which are loaded by either side of the card type as soon as it is shown"""
+
+    if not setting.enabled or setting.insert_stub:
+        return []
+
+    files = []
+
+    for fmt in ["question", "answer"]:
+        the_parser = get_condition_parser(cardtype_name, fmt)
+
+        for scr in setting.scripts:
+            script = get_script(scr, model_name, cardtype_name, fmt)
+
+            if (
+                not script.enabled
+                or script.position not in ["external", "session"]
+                # lazy scripts might never be needed
+                or script.lazy
+                or script.type == "css"
+                or position_does_not_match(script, fmt)
+            ):
+                continue
+
+            needs_inject, _conditions_simplified = the_parser(script.conditions)
+            file = (
+                modules[script.name][0]
+                if is_shared_module(script) and script.name in modules
+                else get_script_filename(model_id, script.name),
+                script.type,
             )
 
-    return stringified
+            if needs_inject and file not in files:
+                files.append(file)
+
+    return files
+
+
+def stringify_setting(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_name: str,
+    position: ScriptInsertion,
+    guard_key: Optional[str] = None,
+    shared: Optional[list] = None,
+    externalized: Optional[List[ExternalizedScript]] = None,
+    modules: Optional[ModuleFiles] = None,
+    bundled: bool = False,
+) -> str:
+    """`bundled` leaves out the scripts which are run by the bundle"""
+    with timed("stringify_setting", model_name, cardtype_name):
+        return _stringify_setting(
+            setting,
+            model_name,
+            model_id,
+            cardtype_name,
+            position,
+            guard_key,
+            shared if shared is not None else [],
+            externalized,
+            modules
+            if modules is not None
+            else get_module_files(setting, model_name, model_id),
+            bundled,
+        )
+
+
+def stringify_assets(
+    setting: ScriptSetting,
+    model_name: str,
+    model_id: int,
+    cardtype_name: str,
+    position: Position,
+    modules: Optional[ModuleFiles] = None,
+) -> List[Tuple[ScriptType, str]]:
+    """Head and body scripts together with their type, which decides how they are loaded"""
+    with timed("stringify_setting", model_name, cardtype_name):
+        return [
+            (sd["type"], stringify_sd(sd, 0, False))
+            for sd in map(
+                to_asset_script_data,
+                get_grouped_script_data(
+                    setting,
+                    model_name,
+                    model_id,
+                    cardtype_name,
+                    position,
+                    None,
+                    [],
+                    None,
+                    modules
+                    if modules is not None
+                    else get_module_files(setting, model_name, model_id),
+                    False,
+                ),
+            )
+        ]
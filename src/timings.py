@@ -0,0 +1,101 @@
+import json
+
+from typing import Dict, List, Tuple
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+from time import perf_counter
+
+from .utils import record_timings
+
+
+# how many recent samples are kept per probe
+window_size = 512
+
+# probe, model name, template name
+TimingKey = Tuple[str, str, str]
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    return sorted_samples[round(fraction * (len(sorted_samples) - 1))]
+
+
+class RollingHistogram:
+    def __init__(self, size: int):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, duration: float) -> None:
+        self.samples.append(duration)
+        self.count += 1
+
+    def stats(self) -> dict:
+        sorted_samples = sorted(self.samples)
+
+        return {
+            "count": self.count,
+            "p50": percentile(sorted_samples, 0.5),
+            "p95": percentile(sorted_samples, 0.95),
+            "max": sorted_samples[-1],
+        }
+
+
+_histograms: Dict[TimingKey, RollingHistogram] = {}
+_lock = Lock()
+
+
+def record_timing(probe: str, model: str, template: str, duration: float) -> None:
+    if not record_timings.value:
+        return
+
+    key = (probe, model or "", template or "")
+
+    with _lock:
+        if key not in _histograms:
+            _histograms[key] = RollingHistogram(window_size)
+
+        _histograms[key].add(duration)
+
+
+def timed(probe: str, model: str = "", template: str = ""):
+    """Only measures while recording is switched on in the timings dialog"""
+    return measure(probe, model, template) if record_timings.value else nullcontext()
+
+
+@contextmanager
+def measure(probe: str, model: str, template: str):
+    start = perf_counter()
+
+    try:
+        yield
+    finally:
+        record_timing(probe, model, template, perf_counter() - start)
+
+
+def get_timing_stats() -> List[dict]:
+    """Durations are in milliseconds"""
+
+    with _lock:
+        items = [(key, hist.stats()) for key, hist in _histograms.items()]
+
+    return [
+        {
+            "probe": probe,
+            "model": model,
+            "template": template,
+            "count": stats["count"],
+            "p50": stats["p50"] * 1000,
+            "p95": stats["p95"] * 1000,
+            "max": stats["max"] * 1000,
+        }
+        for (probe, model, template), stats in sorted(items)
+    ]
+
+
+def export_timing_stats() -> str:
+    return json.dumps(get_timing_stats(), indent=2)
+
+
+def reset_timings() -> None:
+    with _lock:
+        _histograms.clear()
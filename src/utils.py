@@ -39,6 +39,9 @@ class ProfileConfig:
 
 add_assets = ProfileConfig("assetManagerAddAssets", False)
 remove_cards = ProfileConfig("assetManagerRemoveCards", False)
+external_assets = ProfileConfig("assetManagerExternalAssets", False)
+profile_scripts = ProfileConfig("assetManagerProfileScripts", False)
+record_timings = ProfileConfig("assetManagerRecordTimings", False)
 
 
 class ModelConfig:
@@ -58,7 +61,11 @@ class ModelConfig:
 
     @property
     def value(self) -> Any:
-        return self.model[self.keyword] if self.keyword in self.model else self.default
+        return self.get_value(self.model)
+
+    def get_value(self, model) -> Any:
+        """Reads from the given model without changing the current one"""
+        return model[self.keyword] if self.keyword in model else self.default
 
     @value.setter
     def value(self, new_value: Any):
@@ -74,3 +81,4 @@ class ModelConfig:
 
 scripts_config = ModelConfig("assetManager", {})
 html_config = ModelConfig("assetManagerHtml", {})
+plan_config = ModelConfig("assetManagerPlan", {})
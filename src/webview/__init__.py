@@ -1,51 +1,103 @@
-from aqt.gui_hooks import webview_will_set_content
+from typing import Optional, Tuple, Any
+
+from aqt.gui_hooks import (
+    webview_will_set_content,
+    card_will_show,
+    profile_did_open,
+    profile_will_close,
+    webview_did_receive_js_message,
+)
 
 from aqt import mw
 from aqt.reviewer import Reviewer
+from aqt.previewer import Previewer
+from aqt.clayout import CardLayout
 from aqt.webview import WebContent
 
-from ..config import maybe_get_setting_from_card
-from ..stringify import stringify_for_head, stringify_for_body
+from anki.cards import Card
+
+from ..render_cache import RenderedAssets, render_cache
+from ..timings import timed
+from ..script_profile import record_script_profile
+from ..stringify.profile import profile_cmd, get_profile_prelude
+from ..utils import profile_scripts
+
+from .assets import get_assets, assets_to_html
+from .delta import reset_resident, inject_missing_assets
+from .web_exports import clear_external_scripts
+from .prewarm import schedule_warmup, cancel_warmup
+
 
+def get_channel_of(context) -> Optional[str]:
+    if isinstance(context, Reviewer):
+        return "review"
+    elif isinstance(context, Previewer):
+        return "preview"
+    elif isinstance(context, CardLayout):
+        return "clayout"
 
-# addon_package = mw.addonManager.addonFromModule(__name__)
+    return None
 
 
 def append_scripts(web_content: WebContent, context):
-    if not isinstance(context, Reviewer):
+    channel = get_channel_of(context)
+
+    if not channel:
         return
 
-    setting = maybe_get_setting_from_card(context.card)
+    if profile_scripts.value:
+        # the hooks of the scripts only record once the profiler is defined
+        web_content.head += get_profile_prelude(0, True)
+
+    # the previewer and card layout pages are built before any card is rendered,
+    # the same might be true for the reviewer: missing assets are then injected
+    # by `inject_missing_assets` when a card is shown
+    card = context.card if channel == "review" else None
+    model = card.model() if card else None
 
-    if not setting:
+    if not model:
+        reset_resident(channel, RenderedAssets((), ()))
         return
 
-    model_name = context.card.model()["name"]
-    model_id = context.card.model()["id"]
+    template_name = card.template()["name"]
+
+    with timed("append_scripts", model["name"], template_name):
+        assets = get_assets(model, template_name)
+
+    web_content.head += assets_to_html(assets.head)
+    web_content.body += assets_to_html(assets.body)
+
+    reset_resident(channel, assets)
+
+
+def reset_assets():
+    render_cache.clear()
+    clear_external_scripts()
+
+
+def handle_profile_message(
+    handled: Tuple[bool, Any], message: str, context
+) -> Tuple[bool, Any]:
+    if not message.startswith(f"{profile_cmd}:"):
+        return handled
 
-    template_name = context.card.template()["name"]
+    record_script_profile(message[len(profile_cmd) + 1 :])
+    return (True, None)
 
-    ## alternative approach, which would require creating as file and sourcing from web folder
-    ## however it would have the same effect in practice
-    # web_content.css.append(
-    #     f"/_addons/{addon_package}/web/my-addon.css")
-    # web_content.js.append(
-    #     f"/_addons/{addon_package}/web/my-addon.js")
 
-    web_content.head += stringify_for_head(
-        setting,
-        model_name,
-        model_id,
-        template_name,
-    )
+def profile_card_scripts(text: str, card: Card, kind: str) -> str:
+    if not profile_scripts.value:
+        return text
 
-    web_content.body += stringify_for_body(
-        setting,
-        model_name,
-        model_id,
-        template_name,
-    )
+    # pages built before profiling was enabled do not have the profiler yet
+    return f"{get_profile_prelude(0, True)}\n{text}"
 
 
 def init_webview():
     webview_will_set_content.append(append_scripts)
+    card_will_show.append(inject_missing_assets)
+    card_will_show.append(profile_card_scripts)
+    webview_did_receive_js_message.append(handle_profile_message)
+    profile_did_open.append(reset_assets)
+    profile_did_open.append(schedule_warmup)
+    profile_will_close.append(cancel_warmup)
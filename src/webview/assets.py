@@ -0,0 +1,152 @@
+import json
+
+from hashlib import sha1
+from typing import List, Tuple, Iterable
+
+from anki.models import NoteType
+
+from ..config_types import ScriptType
+from ..config import get_setting_from_notetype
+from ..stringify import stringify_head_scripts, stringify_body_scripts
+from ..render_cache import Asset, RenderedAssets, RenderKey, render_cache
+from ..render_plan import get_planned_scripts
+from ..lib.registrar import get_registry_generation
+from ..utils import external_assets
+from ..timings import timed
+
+from .web_exports import export_script
+
+
+def render_scripts(
+    model: NoteType, template_name: str
+) -> Tuple[List[Tuple[ScriptType, str]], List[Tuple[ScriptType, str]]]:
+    if planned := get_planned_scripts(model, template_name):
+        return planned
+
+    # no up-to-date plan was written back for this note type
+    setting = get_setting_from_notetype(model)
+
+    return (
+        stringify_head_scripts(
+            setting,
+            model["name"],
+            model["id"],
+            template_name,
+        ),
+        stringify_body_scripts(
+            setting,
+            model["name"],
+            model["id"],
+            template_name,
+        ),
+    )
+
+
+def to_asset(script_type: ScriptType, code: str) -> Asset:
+    return Asset(
+        sha1(code.encode()).hexdigest(),
+        script_type,
+        code,
+        export_script(code, "css" if script_type == "css" else "js")
+        if external_assets.value
+        else None,
+    )
+
+
+def deliver_assets(
+    head: List[Tuple[ScriptType, str]], body: List[Tuple[ScriptType, str]]
+) -> RenderedAssets:
+    return RenderedAssets(
+        tuple(to_asset(script_type, code) for script_type, code in head),
+        tuple(to_asset(script_type, code) for script_type, code in body),
+    )
+
+
+def get_render_key(model: NoteType, template_name: str) -> RenderKey:
+    return (model["id"], model["mod"], template_name)
+
+
+def get_assets(
+    model: NoteType, template_name: str, cached: bool = True
+) -> RenderedAssets:
+    """`cached` is false for note types which are being edited"""
+    if not cached:
+        with timed("render_assets", model["name"], template_name):
+            return deliver_assets(*render_scripts(model, template_name))
+
+    key = get_render_key(model, template_name)
+
+    if assets := render_cache.get(key):
+        return assets
+
+    generation = get_registry_generation()
+
+    with timed("render_assets", model["name"], template_name):
+        assets = deliver_assets(*render_scripts(model, template_name))
+
+    render_cache.put(key, assets, generation)
+
+    return assets
+
+
+def asset_to_html(asset: Asset) -> str:
+    if asset.type == "css":
+        return (
+            f'<link rel="stylesheet" href="{asset.src}">'
+            if asset.src
+            else f"<style>\n{asset.code}\n</style>"
+        )
+
+    module = ' type="module"' if asset.type == "esm" else ""
+
+    return (
+        f'<script{module} src="{asset.src}"></script>'
+        if asset.src
+        else f"<script{module}>\n{asset.code}\n</script>"
+    )
+
+
+def assets_to_html(assets: Iterable[Asset]) -> str:
+    return "\n".join([asset_to_html(asset) for asset in assets])
+
+
+def escape_for_script(value) -> str:
+    # the result is placed inside a <script> element
+    return json.dumps(value).replace("</", "<\\/")
+
+
+def asset_to_js(asset: Asset, parent: str) -> str:
+    return f"amAddAsset(document.{parent}, {escape_for_script(asset.type)}, {escape_for_script(asset.code)}, {escape_for_script(asset.src)})"
+
+
+def assets_to_js(head: Iterable[Asset], body: Iterable[Asset]) -> str:
+    """Appends the assets to an existing page, keeping their order"""
+
+    additions = [asset_to_js(asset, "head") for asset in head] + [
+        asset_to_js(asset, "body") for asset in body
+    ]
+
+    return "\n".join(
+        [
+            "(function () {",
+            "    var amAddAsset = function (parent, type, code, src) {",
+            "        var element",
+            '        if (type === "css" && src) {',
+            '            element = document.createElement("link")',
+            '            element.rel = "stylesheet"',
+            "            element.href = src",
+            '        } else if (type === "css") {',
+            '            element = document.createElement("style")',
+            "            element.textContent = code",
+            "        } else {",
+            '            element = document.createElement("script")',
+            '            if (type === "esm") { element.type = "module" }',
+            "            if (src) { element.src = src; element.async = false }",
+            "            else { element.text = code }",
+            "        }",
+            "        parent.appendChild(element)",
+            "    }",
+            *[f"    {addition}" for addition in additions],
+            "})()",
+        ]
+    )
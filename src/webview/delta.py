@@ -0,0 +1,53 @@
+import re
+
+from typing import Dict, Optional, Set
+
+from anki.cards import Card
+
+from ..render_cache import RenderedAssets
+
+from .assets import get_assets, assets_to_js
+
+
+# reviewer, browser previewer, and card layout editor
+channel_regex = re.compile(r"^(review|preview|clayout)(?:Question|Answer)$")
+
+# keys of the assets that were already loaded into each page
+resident: Dict[str, Set[str]] = {}
+
+
+def get_channel(kind: str) -> Optional[str]:
+    match = channel_regex.match(kind)
+    return match.group(1) if match else None
+
+
+def reset_resident(channel: str, assets: RenderedAssets) -> None:
+    """Is called whenever the page of a channel is built from scratch"""
+    resident[channel] = set([asset.key for asset in [*assets.head, *assets.body]])
+
+
+def inject_missing_assets(text: str, card: Card, kind: str) -> str:
+    channel = get_channel(kind)
+
+    if not channel or channel not in resident:
+        return text
+
+    model = card.model()
+
+    if not model:
+        return text
+
+    # the card layout editor changes the note type without changing its mtime
+    assets = get_assets(model, card.template()["name"], channel != "clayout")
+    loaded = resident[channel]
+
+    missing_head = [asset for asset in assets.head if asset.key not in loaded]
+    missing_body = [asset for asset in assets.body if asset.key not in loaded]
+
+    if len(missing_head) == 0 and len(missing_body) == 0:
+        return text
+
+    loaded.update([asset.key for asset in [*missing_head, *missing_body]])
+
+    # runs before the scripts of the card itself
+    return f"<script>\n{assets_to_js(missing_head, missing_body)}\n</script>\n{text}"
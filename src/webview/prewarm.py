@@ -0,0 +1,175 @@
+from typing import List, Optional, Tuple
+from time import perf_counter
+
+from aqt import mw
+from anki.models import NoteType
+
+from ..config_types import ScriptType
+from ..lib.registrar import get_meta_scripts, get_registry_generation
+from ..render_cache import render_cache
+from ..timings import record_timing
+from ..utils import scripts_config
+
+from .assets import get_assets, get_render_key, render_scripts, deliver_assets
+
+
+# how many note types are rendered in parallel
+max_concurrency = 2
+# give other add-ons the chance to register their meta scripts first
+start_delay = 1000
+
+# template name, head scripts, body scripts
+RenderedTemplate = Tuple[
+    str, List[Tuple[ScriptType, str]], List[Tuple[ScriptType, str]]
+]
+
+
+def needs_warmup(model: NoteType) -> bool:
+    setting = scripts_config.get_value(model)
+    return "enabled" in setting and setting["enabled"]
+
+
+def calls_other_addons(model: NoteType) -> bool:
+    """Meta scripts and labels call the interfaces and reducers of other add-ons,
+    which are not meant to be called off the main thread"""
+    setting = scripts_config.get_value(model)
+
+    return len(get_meta_scripts(model["id"])) > 0 or any(
+        script and ("name" not in script or script.get("label"))
+        for script in setting.get("scripts", [])
+    )
+
+
+def render_model(
+    model: NoteType, warmer: "AssetWarmer"
+) -> Tuple[List[RenderedTemplate], float]:
+    start = perf_counter()
+    rendered = []
+
+    for template in model["tmpls"]:
+        if warmer.cancelled:
+            break
+
+        rendered.append((template["name"], *render_scripts(model, template["name"])))
+
+    return rendered, perf_counter() - start
+
+
+class AssetWarmer:
+    """Fills the render cache after a profile opens, so the first review is not delayed.
+    Note types which only consist of concrete scripts are rendered in the background,
+    all others on the main thread, one card type at a time"""
+
+    def __init__(self, models: List[NoteType]):
+        self.pending = list(models)
+        self.running = 0
+        self.cancelled = False
+
+    def start(self) -> None:
+        for _ in range(max_concurrency):
+            self.schedule_next()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self.pending.clear()
+
+    def schedule_next(self) -> None:
+        if self.cancelled or len(self.pending) == 0:
+            return
+
+        model = self.pending.pop(0)
+        self.running += 1
+
+        if calls_other_addons(model):
+            template_names = [template["name"] for template in model["tmpls"]]
+            self.warm_step(model, template_names, 0.0)
+            return
+
+        generation = get_registry_generation()
+
+        mw.taskman.run_in_background(
+            lambda: render_model(model, self),
+            lambda future: self.on_rendered(model, generation, future),
+        )
+
+    def warm_step(
+        self, model: NoteType, template_names: List[str], duration: float
+    ) -> None:
+        if self.cancelled or len(template_names) == 0:
+            self.on_done(model, duration)
+            return
+
+        start = perf_counter()
+
+        try:
+            get_assets(model, template_names[0])
+        except Exception:
+            # the error is shown once a card of the note type is reviewed
+            self.on_done(model, None)
+            return
+
+        duration += perf_counter() - start
+
+        # lets the event loop handle input between two card types
+        mw.progress.timer(
+            0, lambda: self.warm_step(model, template_names[1:], duration), False
+        )
+
+    def on_rendered(self, model: NoteType, generation: int, future) -> None:
+        if self.cancelled:
+            # the profile was closed while rendering, its files are not wanted anymore
+            self.on_done(model, None)
+            return
+
+        try:
+            rendered, duration = future.result()
+            start = perf_counter()
+
+            # files of external assets are only written from the main thread
+            for template_name, head, body in rendered:
+                render_cache.put(
+                    get_render_key(model, template_name),
+                    deliver_assets(head, body),
+                    generation,
+                )
+        except Exception:
+            self.on_done(model, None)
+            return
+
+        self.on_done(model, duration + perf_counter() - start)
+
+    def on_done(self, model: NoteType, duration: Optional[float]) -> None:
+        self.running -= 1
+
+        if duration is not None and not self.cancelled:
+            # shown per note type in the timings dialog
+            record_timing("warmup", model["name"], "", duration)
+
+        self.schedule_next()
+
+
+current_warmer: Optional[AssetWarmer] = None
+
+
+def start_warmup() -> None:
+    global current_warmer
+
+    if not mw.col:
+        return
+
+    current_warmer = AssetWarmer(
+        [model for model in mw.col.models.all() if needs_warmup(model)]
+    )
+    current_warmer.start()
+
+
+def schedule_warmup() -> None:
+    mw.progress.timer(start_delay, start_warmup, False)
+
+
+def cancel_warmup() -> None:
+    global current_warmer
+
+    if current_warmer:
+        current_warmer.cancel()
+        current_warmer = None
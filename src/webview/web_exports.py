@@ -0,0 +1,36 @@
+from re import match
+from os import listdir, remove
+from pathlib import Path
+from hashlib import sha1
+
+from aqt import mw
+
+
+addon_package = mw.addonManager.addonFromModule(__name__)
+external_regex = r"^_am_[0-9a-f]+\.(js|css)$"
+
+
+def get_web_folder() -> Path:
+    return Path(mw.addonManager.addonsFolder(addon_package), "web")
+
+
+def export_script(code: str, extension: str = "js") -> str:
+    """Writes the code to a file named by its hash, which is exported by `setWebExports`"""
+
+    filename = f"_am_{sha1(code.encode()).hexdigest()}.{extension}"
+    filepath = get_web_folder() / filename
+
+    # content-addressed, so an existing file is always up to date
+    if not filepath.exists():
+        filepath.write_text(code, encoding="utf-8")
+
+    return f"/_addons/{addon_package}/web/{filename}"
+
+
+def clear_external_scripts() -> None:
+    """Removes files from earlier sessions, they are recreated on demand"""
+    folder = get_web_folder()
+
+    for file in listdir(folder):
+        if match(external_regex, file):
+            remove(folder / file)